@@ -0,0 +1,156 @@
+import json
+from os import stat, scandir, remove, replace, makedirs, cpu_count
+from os.path import join as path_join
+from threading import Event
+from zipfile import ZipFile, ZIP_DEFLATED
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from loader import file_digest, list_content_dirs, list_exam_dirs
+from core import export_contents
+
+MANIFEST_NAME = "etsviewer_manifest.json"
+MANIFEST_VERSION = 1
+
+BatchResult = namedtuple("BatchResult", "exported skipped failed cancelled")
+
+def output_name(exam_name: str) -> str:
+    return f"export_{exam_name}.txt"
+
+def exam_mtime(exam_dir: str) -> int:
+    # 作业文件夹、各 content 目录和其中 content.json 的最新更改时间，条目增删或改写都会让它变化
+    newest = stat(exam_dir).st_mtime_ns
+    with scandir(exam_dir) as entries:
+        for entry in entries:
+            if entry.name.startswith("content") and entry.is_dir():
+                newest = max(newest, entry.stat().st_mtime_ns)
+                try:
+                    newest = max(newest, stat(path_join(entry.path, "content.json")).st_mtime_ns)
+                except FileNotFoundError:
+                    pass
+    return newest
+
+def load_manifest(output_dir: str, pretty_print_enabled: bool, show_full_answers: bool) -> dict:
+    # 返回 作业文件夹名 -> {"mtime_ns", "output", "digest"}，导出失败的作业为 {"mtime_ns", "error"}，
+    # 部分条目无法读取的作业为 {"mtime_ns", "output", "digest", "error"}；导出模式不同时以前的记录全部作废
+    try:
+        with open(path_join(output_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("mode") != [pretty_print_enabled, show_full_answers]:
+        return {}
+    return manifest.get("exams", {})
+
+def save_manifest(output_dir: str, pretty_print_enabled: bool, show_full_answers: bool, exams: dict):
+    pathname = path_join(output_dir, MANIFEST_NAME)
+    with open(pathname + ".part", "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "mode": [pretty_print_enabled, show_full_answers], "exams": exams}, f, ensure_ascii=False, indent=4)
+    replace(pathname + ".part", pathname)
+
+def is_unchanged(output_dir: str, record: dict, mtime_ns: int) -> bool:
+    # 导出文件被删除或改动过也要重新导出，上次失败的作业每次都重试
+    if record is None or "error" in record or record["mtime_ns"] != mtime_ns:
+        return False
+    try:
+        return file_digest(path_join(output_dir, record["output"])) == record["digest"]
+    except FileNotFoundError:
+        return False
+
+def export_exam(exam_dir: str, pathname: str, pretty_print_enabled: bool, show_full_answers: bool) -> tuple:
+    # 在子进程里执行：先写到临时文件，完成后再替换，中途退出不会留下不完整的导出文件。
+    # 返回 (导出文件哈希, 无法读取的条目列表)，其余条目照常导出
+    errors = []
+    try:
+        export_contents(pathname + ".part", exam_dir, list_content_dirs(exam_dir), pretty_print_enabled, show_full_answers, errors=errors)
+    except BaseException:
+        try:
+            remove(pathname + ".part")
+        except OSError:
+            pass
+        raise
+    digest = file_digest(pathname + ".part")
+    replace(pathname + ".part", pathname)
+    return digest, errors
+
+def write_archive(archive_path: str, output_dir: str, exams: dict):
+    with ZipFile(archive_path + ".part", "w", compression=ZIP_DEFLATED) as archive:
+        for exam_name in sorted(exams):
+            if "output" not in exams[exam_name]:
+                continue
+            archive.write(path_join(output_dir, exams[exam_name]["output"]), exams[exam_name]["output"])
+    replace(archive_path + ".part", archive_path)
+
+def batch_export(parent: str, output_dir: str, pretty_print_enabled: bool, show_full_answers: bool, max_workers: int = None,
+                 progress=None, cancel_event: Event = None, archive_path: str = None, force: bool = False) -> BatchResult:
+    # 把 parent 下每个作业文件夹导出为 output_dir 里的一个文件，用多个进程并行格式化。
+    # 清单记录每个作业的 (更改时间, 导出文件, 导出文件哈希)，再次运行时跳过没有变化的作业；
+    # 每完成一个作业就保存清单，中途取消或出错后可以接着导出。progress(已完成, 需要导出的总数, 作业文件夹名)
+    makedirs(output_dir, exist_ok=True)
+    manifest = {} if force else load_manifest(output_dir, pretty_print_enabled, show_full_answers)
+    exams = {}
+    tasks = []
+    for exam_name in sorted(list_exam_dirs(parent)):
+        exam_dir = path_join(parent, exam_name)
+        mtime_ns = exam_mtime(exam_dir)
+        if is_unchanged(output_dir, manifest.get(exam_name), mtime_ns):
+            exams[exam_name] = manifest[exam_name]
+        else:
+            tasks.append((exam_name, exam_dir, mtime_ns))
+    skipped = len(exams)
+    exported = 0
+    failed = []
+    cancelled = False
+    if progress is not None:
+        progress(0, len(tasks), "")
+
+    def finish(exam_name: str, mtime_ns: int, result):
+        # 单个作业出错 (格式化出错等) 只记为该作业失败，其余作业继续导出；有条目无法读取时导出文件照常保存，
+        # 但作业也记为失败，下次重试
+        nonlocal exported
+        if isinstance(result, Exception):
+            failed.append((exam_name, f"{type(result).__name__}: {result}"))
+            exams[exam_name] = {"mtime_ns": mtime_ns, "error": failed[-1][1]}
+        else:
+            digest, errors = result
+            exams[exam_name] = {"mtime_ns": mtime_ns, "output": output_name(exam_name), "digest": digest}
+            if errors:
+                failed.append((exam_name, "; ".join(errors)))
+                exams[exam_name]["error"] = failed[-1][1]
+            else:
+                exported += 1
+        save_manifest(output_dir, pretty_print_enabled, show_full_answers, exams)
+        if progress is not None:
+            progress(exported + len(failed), len(tasks), exam_name)
+
+    max_workers = max_workers or min(cpu_count() or 1, len(tasks))
+    if max_workers <= 1:
+        for exam_name, exam_dir, mtime_ns in tasks:
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+                break
+            try:
+                result = export_exam(exam_dir, path_join(output_dir, output_name(exam_name)), pretty_print_enabled, show_full_answers)
+            except Exception as e:
+                result = e
+            finish(exam_name, mtime_ns, result)
+    else:
+        with ProcessPoolExecutor(max_workers) as executor:
+            futures = {
+                executor.submit(export_exam, exam_dir, path_join(output_dir, output_name(exam_name)), pretty_print_enabled, show_full_answers): (exam_name, mtime_ns)
+                for exam_name, exam_dir, mtime_ns in tasks
+            }
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = e
+                finish(*futures[future], result)
+                if cancel_event is not None and cancel_event.is_set():
+                    # 已经开始的作业会做完，但不再记录
+                    cancelled = True
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    break
+    save_manifest(output_dir, pretty_print_enabled, show_full_answers, exams)
+    if archive_path is not None and not cancelled:
+        write_archive(archive_path, output_dir, exams)
+    return BatchResult(exported, skipped, failed, cancelled)
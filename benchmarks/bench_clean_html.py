@@ -0,0 +1,114 @@
+import re
+import sys
+import html
+import random
+from os.path import dirname, abspath
+from timeit import timeit
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from core import clean_html_tags, _clean_html_tags
+
+def legacy_clean_html_tags(content: str) -> str:
+    if not content:
+        return ""
+    content = re.sub(r"<!--.*?-->", "", content, flags=re.DOTALL)
+    content = re.sub(r"<[^>]*>", "", content)
+    content = html.unescape(content)
+    content = re.sub(r"\n\s*\n", "\n", content).strip()
+    return content
+
+GOLDEN_CASES = [
+    "",
+    "plain text",
+    "  padded  ",
+    "<p>Hello</p>",
+    "<p>Hello</p>\n\n<p>World</p>",
+    "a\n<br>\n b",
+    "a\n<br/>\n\n  <span>\n</span>c",
+    "a\n<b\nc>\nd",
+    "\n\n<b>x",
+    "x<b>\n \t\n",
+    "<!-- comment -->text",
+    "<!-- a > b -->text",
+    "<!-- unclosed > tail",
+    "<a <!-- x --> b>rest",
+    "<<!-- -->b>rest",
+    "1 < 2 and 3 > 2",
+    "unclosed <tag",
+    "&lt;b&gt;bold&lt;/b&gt;",
+    "Tom &amp; Jerry",
+    "&amp",
+    "&am<b>p;",
+    "line&#10;&#10;line",
+    "line\n&nbsp;\nline",
+    "line\n　\nline",
+    "line\n \nline",
+    "<span class=\"ets_th1\">ets_th1 </span>What did he say?",
+    "<p>Good morning!</br>How are you?</p>",
+    "<div>\r\n\r\n<p>windows</p>\r\n</div>",
+    "中文<br>内容\n\n\n结束",
+]
+
+PIECES = [
+    "Hello", "world", "你好", "谢谢", " ", "  ", "\t", "\n", "\n\n", "\r\n", "　", "\xa0",
+    "<p>", "</p>", "<br>", "</br>", "<br/>", "<span class=\"ets_th1\">", "</span>", "<b\n>",
+    "<!--", "-->", "<!-- note -->", "<", ">", "&amp;", "&lt;", "&gt;", "&nbsp;", "&#10;",
+    "&#x4e2d;", "&", "&am", "p;", "1. ", "What ", "?",
+]
+
+def golden_corpus(size: int = 20000, seed: int = 20240101) -> list:
+    rng = random.Random(seed)
+    corpus = list(GOLDEN_CASES)
+    for _ in range(size):
+        corpus.append("".join(rng.choice(PIECES) for _ in range(rng.randint(1, 40))))
+    return corpus
+
+def realistic_corpus(seed: int = 7) -> list:
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(200):
+        sentences = [f"<p>Sentence {i}-{j}: the quick brown fox &amp; the lazy dog.</p>" for j in range(rng.randint(1, 8))]
+        corpus.append("\n\n".join(sentences))
+        corpus.append(f"<span class=\"ets_th{i}\">ets_th{i} </span>Question number {i}?")
+        corpus.append(f"Answer {i} without any markup at all.")
+    return corpus
+
+def long_corpus() -> list:
+    # 整篇短文、对话：很长、标签很多、没有实体，不会被缓存
+    return [
+        "<p>An essay paragraph about the topic of the day.</p>\n\n" * 200,
+        "".join(f"<p><span class=\"ets_th{i}\">Line {i}.</span></p>\n" for i in range(300)),
+    ]
+
+def check_golden():
+    for content in golden_corpus() + long_corpus():
+        expected = legacy_clean_html_tags(content)
+        actual = clean_html_tags(content)
+        if actual != expected:
+            raise AssertionError(f"输出不一致: {content!r}\n旧: {expected!r}\n新: {actual!r}")
+
+def bench_corpus(name: str, corpus: list, number: int):
+    def run(func):
+        for content in corpus:
+            func(content)
+
+    legacy = timeit(lambda: run(legacy_clean_html_tags), number=number)
+    _clean_html_tags.cache_clear()
+    uncached = timeit(lambda: run(_clean_html_tags.__wrapped__), number=number)
+    _clean_html_tags.cache_clear()
+    cached = timeit(lambda: run(clean_html_tags), number=number)
+    calls = number * len(corpus)
+    print(name)
+    print(f"{'legacy':<10}{legacy / calls * 1e6:8.2f} us/call")
+    print(f"{'uncached':<10}{uncached / calls * 1e6:8.2f} us/call  x{legacy / uncached:.2f}")
+    print(f"{'cached':<10}{cached / calls * 1e6:8.2f} us/call  x{legacy / cached:.2f}")
+
+def bench(number: int = 20):
+    bench_corpus("short strings", realistic_corpus(), number)
+    bench_corpus("long passages", long_corpus(), number)
+
+if __name__ == "__main__":
+    check_golden()
+    print("golden corpus: OK")
+    bench()
@@ -0,0 +1,92 @@
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+from os import makedirs
+from os.path import dirname, abspath, getsize, join as path_join
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from corpus import generate_tree
+from loader import JSON_DECODERS, content_json_path, list_content_dirs, list_exam_dirs, read_json_file, read_json_text
+
+# 各种损坏或特殊的 content.json，新旧读取方式的结果或报错信息必须一致
+MALFORMED = {
+    "truncated": b'{"structure_type": ',
+    "empty": b"",
+    "trailing_comma": b'{"info": {"value": "a",}}',
+    "bom": b'\xef\xbb\xbf{"info": {}}',
+    "crlf": b'{\r\n  "info": {\r\n    "value": "a"\r\n  ,,}\r\n}',
+    "nan": b'{"info": {"value": NaN}}',
+}
+
+def outcome(read, path: str):
+    try:
+        return "ok", read(path)
+    except (json.JSONDecodeError, FileNotFoundError) as e:
+        return type(e).__name__, str(e)
+
+def check_malformed(work_dir: str) -> bool:
+    same = True
+    makedirs(path_join(work_dir, "malformed"))
+    for name, data in MALFORMED.items():
+        path = path_join(work_dir, "malformed", f"{name}.json")
+        with open(path, "wb") as f:
+            f.write(data)
+        expected = outcome(read_json_text, path)
+        for decoder in JSON_DECODERS.values():
+            actual = outcome(lambda p: read_json_file(p, decoder), path)
+            if actual != expected:
+                same = False
+                print(f"不一致 {name} [{decoder.name}]：{expected} != {actual}")
+    return same
+
+def measure(paths: list, read, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in paths:
+            read(path)
+        best = min(best, time.perf_counter() - start)
+    # 单个文件解析时的内存峰值，取最大的文件
+    tracemalloc.start()
+    read(max(paths, key=getsize))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="比较文本方式读取 content.json 与按字节读取、可替换解码器的耗时和内存")
+    parser.add_argument("--exams", type=int, default=4)
+    parser.add_argument("--contents", type=int, default=8)
+    parser.add_argument("--std", type=int, default=3000)
+    parser.add_argument("--sentences", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        if not check_malformed(work_dir):
+            sys.exit(1)
+        parent = generate_tree(path_join(work_dir, "ets"), args.exams, args.contents, args.std, args.sentences)
+        paths = [
+            content_json_path(path_join(parent, exam_name), content_dir)
+            for exam_name in list_exam_dirs(parent)
+            for content_dir in list_content_dirs(path_join(parent, exam_name))
+        ]
+        total = sum(getsize(path) for path in paths)
+        print(f"{len(paths)} 个文件，共 {total / 2 ** 20:.1f} MiB，最大 {max(map(getsize, paths)) / 2 ** 20:.2f} MiB")
+        for path in paths:
+            if any(read_json_file(path, decoder) != read_json_text(path) for decoder in JSON_DECODERS.values()):
+                print(f"解析结果不一致：{path}")
+                sys.exit(1)
+
+        legacy_time, legacy_peak = measure(paths, read_json_text, args.repeat)
+        print(f"{'text + json':<16}{legacy_time * 1000:10.1f} ms{total / legacy_time / 2 ** 20:10.1f} MiB/s  peak {legacy_peak / 2 ** 20:6.2f} MiB")
+        for decoder in JSON_DECODERS.values():
+            elapsed, peak = measure(paths, lambda path: read_json_file(path, decoder), args.repeat)
+            print(
+                f"{'bytes + ' + decoder.name:<16}{elapsed * 1000:10.1f} ms{total / elapsed / 2 ** 20:10.1f} MiB/s  peak {peak / 2 ** 20:6.2f} MiB"
+                f"  ({legacy_time / elapsed:.2f}x)"
+            )
@@ -0,0 +1,108 @@
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+from os import walk, makedirs
+from os.path import dirname, abspath, join as path_join
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from loader import document_cache, list_content_dirs
+from core import export_contents, render_cache, record_cache, ir_cache
+from suite import clear_caches
+from legacy_format import format_question_json as legacy_format_question_json
+
+def make_large_exam_dir(root: str, content_count: int, sublist_size: int) -> str:
+    exam_dir = path_join(root, "200001")
+    for i in range(content_count):
+        content_dir = path_join(exam_dir, f"content{i}")
+        makedirs(content_dir)
+        if i % 2:
+            document = {
+                "structure_type": "collector.repeat_essay",
+                "info": {
+                    "value": "<p>An essay paragraph.</p>\n\n" * sublist_size,
+                    "sublist": [{"text": f"<b>Sentence {j}.</b>", "translate": f"句子 {j}。"} for j in range(sublist_size)],
+                },
+            }
+        else:
+            document = {
+                "structure_type": "collector.role",
+                "info": {
+                    "value": "<p>Dialogue line.</p>\n" * 20,
+                    "question": [
+                        {"ask": f"<span>ets_th{j} </span>Question {j}?", "std": [{"value": f"<p>Answer {k}</p>"} for k in range(sublist_size // 10)]}
+                        for j in range(5)
+                    ],
+                },
+            }
+        # 每个条目内容不同，否则导出时重复内容只写引用，无法与旧导出逐字节比较
+        document["id"] = i
+        with open(path_join(content_dir, "content.json"), "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False)
+    makedirs(path_join(exam_dir, f"content{content_count}"))
+    return exam_dir
+
+def legacy_export(pathname: str, dir_path: str, pretty_print_enabled: bool, show_full_answers: bool):
+    # 基线版本 init_data 的读取和 export_to_txt 的写出循环，全部条目读进内存后一次性导出
+    contents, content_names = [], []
+    _, dir_names, _ = next(walk(dir_path))
+    for dir_name in dir_names:
+        if dir_name.startswith("content"):
+            try:
+                with open(path_join(dir_path, dir_name, "content.json"), "r", encoding="utf-8") as f:
+                    content_text = f.read()
+                contents.append(json.loads(content_text))
+                content_names.append(dir_name)
+            except (json.JSONDecodeError, FileNotFoundError):
+                pass
+    with open(pathname, 'w', encoding='utf-8') as file:
+        for i, (content_name, content_data) in enumerate(zip(content_names, contents)):
+            file.write(f"--- 条目 {i+1}: {content_name} ---\n")
+            if pretty_print_enabled:
+                formatted_content = legacy_format_question_json(
+                    content_data,
+                    show_full_answers=show_full_answers
+                )
+            else:
+                formatted_content = json.dumps(content_data, indent=4, ensure_ascii=False)
+            file.write(formatted_content)
+            file.write("\n\n")
+
+def streaming_export(pathname: str, dir_path: str, pretty_print_enabled: bool, show_full_answers: bool):
+    export_contents(pathname, dir_path, list_content_dirs(dir_path), pretty_print_enabled, show_full_answers)
+
+def measure(func, *args):
+    clear_caches()
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="校验流式导出与旧导出输出一致，并比较耗时与峰值内存")
+    parser.add_argument("--contents", type=int, default=20)
+    parser.add_argument("--sublist", type=int, default=2000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as root:
+        exam_dir = make_large_exam_dir(root, args.contents, args.sublist)
+        # 导出时不经过缓存，模拟只受单个条目大小约束的情况
+        document_cache.configure(max_entries=0)
+        record_cache.configure(max_entries=0)
+        render_cache.configure(max_entries=0)
+        ir_cache.configure(max_entries=0)
+        for pretty_print_enabled, show_full_answers in ((True, False), (True, True), (False, False)):
+            legacy_path = path_join(root, "legacy.txt")
+            streaming_path = path_join(root, "streaming.txt")
+            legacy = measure(legacy_export, legacy_path, exam_dir, pretty_print_enabled, show_full_answers)
+            streaming = measure(streaming_export, streaming_path, exam_dir, pretty_print_enabled, show_full_answers)
+            with open(legacy_path, "rb") as f1, open(streaming_path, "rb") as f2:
+                assert f1.read() == f2.read(), "流式导出结果与旧导出不一致"
+            mode = f"pretty={pretty_print_enabled} full={show_full_answers}"
+            print(f"{mode:<24}legacy {legacy[0] * 1000:8.1f} ms {legacy[1] / 2 ** 20:7.1f} MiB | "
+                  f"streaming {streaming[0] * 1000:8.1f} ms {streaming[1] / 2 ** 20:7.1f} MiB")
@@ -0,0 +1,70 @@
+import sys
+import json
+import time
+import argparse
+import tempfile
+from os import makedirs
+from os.path import dirname, abspath, join as path_join
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import loader
+
+def make_exam_dir(root: str, content_count: int, broken: int = 0) -> str:
+    exam_dir = path_join(root, "100001")
+    for i in range(content_count):
+        content_dir = path_join(exam_dir, f"content{i}")
+        makedirs(content_dir)
+        document = {
+            "structure_type": "collector.role",
+            "info": {
+                "value": "<p>Dialogue line.</p>\n" * 50,
+                "question": [
+                    {"ask": f"<span>ets_th{j} </span>Question {j}?", "std": [{"value": f"Answer {k}"} for k in range(30)]}
+                    for j in range(5)
+                ],
+            },
+        }
+        with open(path_join(content_dir, "content.json"), "w", encoding="utf-8") as f:
+            if i < broken:
+                f.write("{broken")
+            else:
+                json.dump(document, f, ensure_ascii=False)
+    makedirs(path_join(exam_dir, f"content{content_count}"))
+    return exam_dir
+
+def with_latency(latency: float):
+    # DocumentCache 通过 load_json_file 读文件，延迟要加在这里
+    load_json_file = loader.load_json_file
+
+    def slow_load(path, *args, **kwargs):
+        time.sleep(latency)
+        return load_json_file(path, *args, **kwargs)
+
+    loader.load_json_file = slow_load
+
+def measure(exam_dir: str, max_workers: int, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        loader.document_cache.clear()
+        start = time.perf_counter()
+        result = loader.load_contents(exam_dir, max_workers=max_workers)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="比较串行与线程池加载 content*/content.json 的耗时")
+    parser.add_argument("--contents", type=int, default=60)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="模拟慢速/网络同步磁盘的单文件读取延迟")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if args.latency_ms > 0:
+        with_latency(args.latency_ms / 1000)
+    with tempfile.TemporaryDirectory() as root:
+        exam_dir = make_exam_dir(root, args.contents, broken=2)
+        serial, serial_result = measure(exam_dir, 1, args.repeat)
+        parallel, parallel_result = measure(exam_dir, loader.MAX_LOAD_WORKERS, args.repeat)
+        assert serial_result == parallel_result, "并行加载结果与串行不一致"
+        print(f"{'serial':<10}{serial * 1000:8.1f} ms")
+        print(f"{'parallel':<10}{parallel * 1000:8.1f} ms  x{serial / parallel:.2f}")
+        print(f"errors: {len(parallel_result[2])}")
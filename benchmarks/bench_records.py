@@ -0,0 +1,69 @@
+import gc
+import sys
+import json
+import argparse
+import tempfile
+import tracemalloc
+from os.path import dirname, abspath, getsize, join as path_join
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from corpus import generate_tree
+from loader import content_json_path, list_content_dirs, list_exam_dirs, read_json_file
+from core import format_question_json, slim_record
+
+def add_metadata(path: str, fields: int):
+    # 真实的 content.json 每个答案、句子还带有音频、评分等格式化用不到的字段，这里按数量补上
+    with open(path, encoding="utf-8") as f:
+        document = json.load(f)
+    info = document.get("info", {})
+    for key in ("std", "sublist", "question", "xtlist"):
+        for item in info.get(key, []):
+            for i in range(fields):
+                item[f"meta_{i}"] = {"url": f"https://example.com/{key}/{i}.mp3", "score": i, "duration": i * 1.5}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, ensure_ascii=False)
+
+def retained(paths: list, keep) -> int:
+    # 把所有条目读进来后仍然占用的内存 (不含解析时的临时峰值)
+    gc.collect()
+    tracemalloc.start()
+    retained = [keep(read_json_file(path)) for path in paths]
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del retained
+    return current
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="比较保留完整文档与精简记录时常驻的内存")
+    parser.add_argument("--exams", type=int, default=20)
+    parser.add_argument("--contents", type=int, default=8)
+    parser.add_argument("--std", type=int, default=30)
+    parser.add_argument("--sentences", type=int, default=20)
+    parser.add_argument("--metadata", type=int, default=2, help="每个答案、句子额外附带的无用字段数，0 表示使用原始语料")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        parent = generate_tree(path_join(work_dir, "ets"), args.exams, args.contents, args.std, args.sentences)
+        paths = [
+            content_json_path(path_join(parent, exam_name), content_dir)
+            for exam_name in list_exam_dirs(parent)
+            for content_dir in list_content_dirs(path_join(parent, exam_name))
+        ]
+        if args.metadata:
+            for path in paths:
+                add_metadata(path, args.metadata)
+        for path in paths:
+            document = read_json_file(path)
+            for show_full_answers in (True, False):
+                if format_question_json(document, show_full_answers) != format_question_json(slim_record(document), show_full_answers):
+                    print(f"精简记录的格式化结果不一致：{path}")
+                    sys.exit(1)
+
+        total = sum(getsize(path) for path in paths)
+        print(f"{len(paths)} 个文件，共 {total / 2 ** 20:.1f} MiB")
+        full = retained(paths, lambda document: document)
+        slim = retained(paths, slim_record)
+        print(f"{'完整文档':<10}{full / 2 ** 20:10.1f} MiB")
+        print(f"{'精简记录':<10}{slim / 2 ** 20:10.1f} MiB  (减少 {1 - slim / full:.0%})")
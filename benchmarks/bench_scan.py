@@ -0,0 +1,161 @@
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+from collections import Counter
+from os.path import dirname, abspath, getmtime, join as path_join
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import scanner
+
+calls = Counter()
+latency = 0.0
+
+class CountingEntry:
+    def __init__(self, entry):
+        self.entry = entry
+
+    def __getattr__(self, name):
+        return getattr(self.entry, name)
+
+    def is_dir(self, *args, **kwargs):
+        calls["DirEntry.is_dir"] += 1
+        return self.entry.is_dir(*args, **kwargs)
+
+    def stat(self, *args, **kwargs):
+        calls["DirEntry.stat"] += 1
+        if latency and os.name != "nt":
+            # 只有 Windows 的 DirEntry 自带 stat 结果
+            time.sleep(latency / 10)
+        return self.entry.stat(*args, **kwargs)
+
+class CountingScandir:
+    def __init__(self, path):
+        calls["scandir"] += 1
+        if latency:
+            time.sleep(latency)
+        self.iterator = real_scandir(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.iterator.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return CountingEntry(next(self.iterator))
+
+    def close(self):
+        self.iterator.close()
+
+def counting_stat(path, *args, **kwargs):
+    calls["os.stat"] += 1
+    if latency:
+        time.sleep(latency / 10)
+    return real_stat(path, *args, **kwargs)
+
+real_scandir = os.scandir
+real_stat = os.stat
+
+def make_roaming_dir(root: str, accounts: int, exams: int) -> str:
+    for account in range(accounts):
+        account_dir = path_join(root, f"{account:024X}")
+        for exam in range(exams):
+            os.makedirs(path_join(account_dir, str(1000000 + exam), "content0"))
+        os.makedirs(path_join(account_dir, "resource"))
+    os.makedirs(path_join(root, "Microsoft"))
+    return root
+
+def legacy_scan(roaming_dir: str) -> list:
+    # 以前的做法：os.walk 找到第一个账号文件夹就停下，列表再对每个作业文件夹单独 getmtime
+    _, dir_names, _ = next(os.walk(roaming_dir))
+    for dir_name in dir_names:
+        if re.match(re.compile(r"[0-9A-F]{20,}"), dir_name):
+            parent = path_join(roaming_dir, dir_name)
+            break
+    else:
+        return []
+    _, dir_names, _ = next(os.walk(parent))
+    return [(dir_name, getmtime(path_join(parent, dir_name))) for dir_name in dir_names if re.match(re.compile(r".*\d+"), dir_name)]
+
+def legacy_scan_all(roaming_dir: str) -> list:
+    # 以前的做法扩展到所有账号：逐个根目录串行扫描
+    _, dir_names, _ = next(os.walk(roaming_dir))
+    result = []
+    for dir_name in dir_names:
+        if re.match(re.compile(r"[0-9A-F]{20,}"), dir_name):
+            parent = path_join(roaming_dir, dir_name)
+            _, exam_names, _ = next(os.walk(parent))
+            result.extend(
+                (dir_name, exam_name, getmtime(path_join(parent, exam_name)))
+                for exam_name in exam_names if re.match(re.compile(r".*\d+"), exam_name)
+            )
+    return result
+
+def scandir_scan(roaming_dir: str) -> list:
+    return scanner.scan_roots(scanner.find_ets_roots(roaming_dir))
+
+def patch(counting: bool):
+    os.scandir = scanner.scandir = CountingScandir if counting else real_scandir
+    os.stat = counting_stat if counting else real_stat
+
+def measure(func, roaming_dir: str, repeat: int):
+    # 计时时只在模拟延迟时挂代理，计数单独再跑一次
+    patch(latency > 0)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(roaming_dir)
+        best = min(best, time.perf_counter() - start)
+    patch(True)
+    calls.clear()
+    func(roaming_dir)
+    patch(False)
+    return best, dict(calls), result
+
+def stat_syscalls(counts: dict) -> int:
+    # os.stat 每次都是一次系统调用；DirEntry.stat 在 Windows 上直接用目录枚举带回的数据，其他平台需要一次 stat；
+    # DirEntry.is_dir 在文件系统提供 d_type 时不需要系统调用
+    entry_stats = counts.get("DirEntry.stat", 0) if os.name != "nt" else 0
+    return counts.get("os.stat", 0) + entry_stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="比较 os.walk + getmtime 与 scandir 多根目录并行扫描的系统调用次数和耗时")
+    parser.add_argument("--accounts", type=int, default=3)
+    parser.add_argument("--exams", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="模拟网络同步磁盘上每次列目录的延迟 (stat 为其十分之一)")
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        roaming_dir = make_roaming_dir(work_dir, args.accounts, args.exams)
+        print(f"{args.accounts} 个账号，每个 {args.exams} 个作业文件夹 (平台: {os.name})")
+        print(f"{'method':<28}{'roots':>6}{'exams':>8}{'time':>12}{'scandir':>9}{'os.stat':>9}{'entry.stat':>11}{'stat syscalls':>15}")
+        rows = [
+            ("walk + getmtime (first)", legacy_scan),
+            ("walk + getmtime (all)", legacy_scan_all),
+            ("scandir + parallel (all)", scandir_scan),
+        ]
+        results = {}
+        for label, func in rows:
+            elapsed, counts, result = measure(func, roaming_dir, args.repeat)
+            results[label] = result
+            roots = len({entry[0] for entry in result}) if func is not legacy_scan else min(args.accounts, 1)
+            print(
+                f"{label:<28}{roots:>6}{len(result):>8}{elapsed * 1000:10.1f}ms{counts.get('scandir', 0):>9}"
+                f"{counts.get('os.stat', 0):>9}{counts.get('DirEntry.stat', 0):>11}{stat_syscalls(counts):>15}"
+            )
+        legacy = sorted(results["walk + getmtime (all)"])
+        current = sorted((entry.label, entry.name, entry.mtime_ns / 1e9) for entry in results["scandir + parallel (all)"])
+        if [entry[:2] for entry in legacy] != [entry[:2] for entry in current] or any(
+            abs(old[2] - new[2]) > 1e-6 for old, new in zip(legacy, current)
+        ):
+            print("扫描结果不一致")
+            sys.exit(1)
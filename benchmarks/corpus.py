@@ -0,0 +1,124 @@
+import sys
+import json
+import random
+import argparse
+from os import makedirs
+from os.path import join as path_join
+
+STRUCTURE_TYPES = [
+    "collector.role",
+    "collector.picture",
+    "collector.read",
+    "collector.repeat_essay",
+    "collector.repeat_dialogue",
+    "collector.word",
+    "collector.choose",
+]
+
+WORDS = (
+    "the library park weather school teacher friend weekend museum football homework music "
+    "travel breakfast holiday science history computer family city river mountain shopping"
+).split()
+CHINESE = "图书馆公园天气学校老师朋友周末博物馆足球作业音乐旅行早餐假期科学历史电脑家庭城市河流山购物"
+QUESTION_WORDS = ["What", "Who", "How", "Why", "Where", "When", "Which"]
+
+def sentence(rng: random.Random, words: int = 10) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + rng.choice(".?!")
+
+def chinese(rng: random.Random, length: int = 12) -> str:
+    return "".join(rng.choice(CHINESE) for _ in range(length)) + rng.choice("。！？")
+
+def noisy(rng: random.Random, text: str) -> str:
+    # 模拟 ETS 数据里常见的 HTML 噪声：标签、注释、实体和多余空行
+    noise = rng.random()
+    if noise < 0.3:
+        return f"<p><span style=\"color:#333\">{text}</span></p>\n\n"
+    if noise < 0.45:
+        return f"<!-- {rng.choice(WORDS)} -->{text}</br>"
+    if noise < 0.6:
+        return text.replace(" ", "&nbsp;", 1) + " &amp; <br/>\n \n"
+    return text
+
+def paragraph(rng: random.Random, sentences: int) -> str:
+    return "\n".join(noisy(rng, sentence(rng)) for _ in range(sentences))
+
+def make_document(structure_type: str, rng: random.Random, std_answers: int = 30, sentences: int = 20) -> dict:
+    info = {}
+    if structure_type == "collector.role":
+        info["value"] = paragraph(rng, sentences)
+        info["question"] = [
+            {
+                "ask": f"<span class=\"ets_th{i}\">ets_th{i} </span>{rng.choice(QUESTION_WORDS)} {sentence(rng, 6)}",
+                "keywords": " ".join(rng.sample(WORDS, 3)),
+                "std": [{"value": noisy(rng, sentence(rng, 8))} for _ in range(std_answers)],
+            }
+            for i in range(1, 6)
+        ]
+    elif structure_type == "collector.picture":
+        info["topic"] = sentence(rng, 3)
+        info["image"] = f"picture_{rng.randint(1, 999)}.jpg"
+        info["value"] = paragraph(rng, sentences // 2)
+        info["keypoint"] = " ".join(f"{i}. {sentence(rng, 5)}" for i in range(1, 6))
+        info["std"] = [{"value": paragraph(rng, 3)} for _ in range(std_answers)]
+    elif structure_type in ("collector.read", "collector.repeat_essay"):
+        info["value"] = paragraph(rng, sentences * 3)
+        info["sublist"] = [{"text": noisy(rng, sentence(rng)), "translate": chinese(rng)} for _ in range(sentences)]
+    elif structure_type == "collector.repeat_dialogue":
+        info["value"] = paragraph(rng, sentences)
+        info["sublist"] = [
+            {"role": rng.choice("AB"), "text": noisy(rng, sentence(rng)), "translate": chinese(rng)}
+            for _ in range(sentences)
+        ]
+    elif structure_type == "collector.word":
+        info["value"] = " ".join(f"{rng.choice(QUESTION_WORDS)} {sentence(rng, 5)}" for _ in range(5))
+        info["translate"] = "".join(f"{rng.choice(QUESTION_WORDS)} {chinese(rng)}" for _ in range(5))
+    elif structure_type == "collector.choose":
+        info["st_nr"] = paragraph(rng, 3)
+        info["xtlist"] = [
+            {
+                "xt_nr": noisy(rng, sentence(rng, 8)),
+                "answer": rng.choice("ABCD"),
+                "xxlist": [{"xx_mc": letter, "xx_nr": noisy(rng, sentence(rng, 4))} for letter in "ABCD"],
+            }
+            for _ in range(rng.randint(1, 5))
+        ]
+    # 真实文件里还有很多格式化函数用不到的字段
+    info["audio"] = [{"file": f"audio_{i}.mp3", "duration": rng.randint(1, 60)} for i in range(5)]
+    return {"structure_type": structure_type, "version": "1.0", "info": info}
+
+def generate_tree(root: str, exams: int = 50, contents_per_exam: int = 8, std_answers: int = 30, sentences: int = 20, seed: int = 0, broken_ratio: float = 0.0, duplicate_ratio: float = 0.0) -> str:
+    # duplicate_ratio 模拟重复下载的练习：按该比例直接复制之前生成过的某个 content.json
+    rng = random.Random(seed)
+    written = []
+    makedirs(root, exist_ok=True)
+    for exam_number in range(exams):
+        exam_dir = path_join(root, str(1000000 + exam_number))
+        makedirs(path_join(exam_dir, "resource"), exist_ok=True)
+        for content_number in range(contents_per_exam):
+            content_dir = path_join(exam_dir, f"content{content_number}")
+            makedirs(content_dir, exist_ok=True)
+            structure_type = STRUCTURE_TYPES[(exam_number + content_number) % len(STRUCTURE_TYPES)]
+            with open(path_join(content_dir, "content.json"), "w", encoding="utf-8") as f:
+                if rng.random() < broken_ratio:
+                    f.write("{\"structure_type\": ")
+                elif written and rng.random() < duplicate_ratio:
+                    f.write(rng.choice(written))
+                else:
+                    written.append(json.dumps(make_document(structure_type, rng, std_answers, sentences), ensure_ascii=False))
+                    f.write(written[-1])
+    makedirs(path_join(root, "resource"), exist_ok=True)
+    return root
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="生成包含所有 structure_type 的合成 ETS 作业目录")
+    parser.add_argument("root")
+    parser.add_argument("--exams", type=int, default=50)
+    parser.add_argument("--contents", type=int, default=8)
+    parser.add_argument("--std", type=int, default=30)
+    parser.add_argument("--sentences", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--broken", type=float, default=0.0, help="损坏的 content.json 所占比例")
+    parser.add_argument("--duplicates", type=float, default=0.0, help="与之前某个 content.json 完全相同的比例")
+    args = parser.parse_args()
+    generate_tree(args.root, args.exams, args.contents, args.std, args.sentences, args.seed, args.broken, args.duplicates)
+    print(args.root, file=sys.stderr)
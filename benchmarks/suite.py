@@ -0,0 +1,181 @@
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from os import stat
+from datetime import datetime
+from collections import defaultdict
+from os.path import dirname, abspath, getsize, join as path_join
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from corpus import STRUCTURE_TYPES, generate_tree
+from loader import document_cache, content_json_path, list_content_dirs, list_exam_dirs, read_json_file
+from core import format_question_json, build_question_ir, project_ir, export_contents, render_cache, record_cache, ir_cache, _clean_html_tags
+
+def clear_caches():
+    document_cache.clear()
+    record_cache.clear()
+    render_cache.clear()
+    ir_cache.clear()
+    _clean_html_tags.cache_clear()
+
+def run_stage(func, repeat: int) -> dict:
+    # 先取多次运行的最短耗时，再单独跑一次 tracemalloc 记录峰值内存 (tracemalloc 会拖慢计时)
+    best = float("inf")
+    for _ in range(repeat):
+        clear_caches()
+        start = time.perf_counter()
+        items, size = func()
+        best = min(best, time.perf_counter() - start)
+    clear_caches()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {"seconds": best, "items": items, "items_per_second": items / best if best else 0, "peak_bytes": peak}
+    if size:
+        result["bytes"] = size
+        result["bytes_per_second"] = size / best if best else 0
+    return result
+
+def collect_documents(parent: str) -> dict:
+    documents = defaultdict(list)
+    for exam_name in list_exam_dirs(parent):
+        exam_dir = path_join(parent, exam_name)
+        for content_dir in list_content_dirs(exam_dir):
+            try:
+                document = read_json_file(content_json_path(exam_dir, content_dir))
+            except (json.JSONDecodeError, FileNotFoundError):
+                continue
+            documents[document.get("structure_type")].append(document)
+    return documents
+
+def run_suite(parent: str, repeat: int, output_dir: str) -> dict:
+    stages = {}
+
+    def scan():
+        names = list_exam_dirs(parent)
+        for name in names:
+            stat(path_join(parent, name))
+        return len(names), 0
+
+    def parse():
+        count = size = 0
+        for exam_name in list_exam_dirs(parent):
+            exam_dir = path_join(parent, exam_name)
+            for content_dir in list_content_dirs(exam_dir):
+                path = content_json_path(exam_dir, content_dir)
+                try:
+                    read_json_file(path)
+                except (json.JSONDecodeError, FileNotFoundError):
+                    continue
+                count += 1
+                size += getsize(path)
+        return count, size
+
+    stages["scan"] = run_stage(scan, repeat)
+    stages["parse"] = run_stage(parse, repeat)
+
+    documents = collect_documents(parent)
+    for structure_type in STRUCTURE_TYPES:
+        type_documents = documents.get(structure_type, [])
+        if not type_documents:
+            continue
+        for show_full_answers in (False, True):
+            def format_type():
+                for document in type_documents:
+                    format_question_json(document, show_full_answers=show_full_answers)
+                return len(type_documents), 0
+            stages[f"format:{structure_type}:{'full' if show_full_answers else 'short'}"] = run_stage(format_type, repeat)
+
+    all_documents = [document for type_documents in documents.values() for document in type_documents]
+
+    def build_ir():
+        for document in all_documents:
+            build_question_ir(document)
+        return len(all_documents), 0
+
+    irs = [build_question_ir(document) for document in all_documents]
+    stages["ir:build"] = run_stage(build_ir, repeat)
+    for show_full_answers in (False, True):
+        def project():
+            for ir in irs:
+                project_ir(ir, show_full_answers)
+            return len(irs), 0
+        stages[f"ir:project:{'full' if show_full_answers else 'short'}"] = run_stage(project, repeat)
+
+    for pretty_print_enabled in (True, False):
+        def export():
+            count = size = 0
+            for exam_name in list_exam_dirs(parent):
+                exam_dir = path_join(parent, exam_name)
+                pathname = path_join(output_dir, f"export_{exam_name}.txt")
+                export_contents(pathname, exam_dir, list_content_dirs(exam_dir), pretty_print_enabled, False)
+                count += 1
+                size += getsize(pathname)
+            return count, size
+        stages[f"export:{'pretty' if pretty_print_enabled else 'raw'}"] = run_stage(export, repeat)
+    return stages
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    regressed = False
+    print(f"\n{'stage':<42}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, stage in results["stages"].items():
+        old = baseline["stages"].get(name)
+        if old is None:
+            continue
+        change = stage["seconds"] / old["seconds"] - 1 if old["seconds"] else 0
+        flag = "  <-- 变慢" if change > threshold else ""
+        regressed = regressed or change > threshold
+        print(f"{name:<42}{old['seconds'] * 1000:10.1f}ms{stage['seconds'] * 1000:10.1f}ms{change:+10.1%}{flag}")
+    return not regressed
+
+def print_results(stages: dict):
+    print(f"{'stage':<42}{'time':>10}{'items/s':>12}{'MiB/s':>10}{'peak MiB':>10}")
+    for name, stage in stages.items():
+        throughput = f"{stage['bytes_per_second'] / 2 ** 20:10.1f}" if "bytes_per_second" in stage else f"{'':>10}"
+        print(f"{name:<42}{stage['seconds'] * 1000:8.1f}ms{stage['items_per_second']:12.0f}{throughput}{stage['peak_bytes'] / 2 ** 20:10.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="在合成 ETS 目录上测量扫描、解析、格式化和导出的性能")
+    parser.add_argument("--parent", help="使用已有的父目录，不指定则按下面的规模生成")
+    parser.add_argument("--exams", type=int, default=50)
+    parser.add_argument("--contents", type=int, default=8)
+    parser.add_argument("--std", type=int, default=30)
+    parser.add_argument("--sentences", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", help="把结果保存为 JSON")
+    parser.add_argument("--compare", help="与之前保存的 JSON 结果比较")
+    parser.add_argument("--threshold", type=float, default=0.10, help="耗时增加超过该比例视为性能回退")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        parent = args.parent or generate_tree(
+            path_join(work_dir, "ets"), args.exams, args.contents, args.std, args.sentences, args.seed
+        )
+        stages = run_suite(parent, args.repeat, work_dir)
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parent": args.parent,
+            "scale": {"exams": args.exams, "contents": args.contents, "std": args.std, "sentences": args.sentences, "seed": args.seed},
+            "repeat": args.repeat,
+        },
+        "stages": stages,
+    }
+    print_results(stages)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.threshold):
+            sys.exit(1)
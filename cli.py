@@ -0,0 +1,166 @@
+import sys
+import json
+import argparse
+from datetime import datetime
+from os import makedirs, getcwd
+from os.path import basename, normpath, expandvars, join as path_join
+from loader import content_json_path, list_content_dirs, list_exam_dirs
+from core import render_content, write_export, export_contents
+from exam_index import ExamIndex
+from search import SearchIndex
+from scanner import root_of, find_ets_roots, scan_roots
+from dedup import dedup_report
+from batch import batch_export
+
+def resolve_exam_dirs(path: str) -> list:
+    # 含 content* 子目录的视为单个作业文件夹，否则视为存放作业文件夹的父目录
+    if list_content_dirs(path):
+        return [path]
+    return [path_join(path, dir_name) for dir_name in list_exam_dirs(path)]
+
+def resolve_item(content_names: list, item: str) -> str:
+    if item in content_names:
+        return item
+    if item.isdigit() and 1 <= int(item) <= len(content_names):
+        return content_names[int(item) - 1]
+    raise SystemExit(f"找不到条目：{item}")
+
+def render_command(args) -> int:
+    content_names = list_content_dirs(args.exam_dir)
+    if args.item is None:
+        write_export(sys.stdout, args.exam_dir, content_names, not args.raw, args.full)
+        return 0
+    content_name = resolve_item(content_names, args.item)
+    try:
+        sys.stdout.write(render_content(content_json_path(args.exam_dir, content_name), not args.raw, args.full))
+    except (json.JSONDecodeError, FileNotFoundError) as e:
+        print(f"解析错误：\n{content_name}: {str(e)}", file=sys.stderr)
+        return 1
+    sys.stdout.write("\n")
+    return 0
+
+def export_command(args) -> int:
+    exam_dirs = resolve_exam_dirs(args.path)
+    if exam_dirs == [args.path]:
+        content_names = list_content_dirs(args.path)
+        if args.output is None:
+            write_export(sys.stdout, args.path, content_names, not args.raw, args.full)
+        else:
+            export_contents(args.output, args.path, content_names, not args.raw, args.full)
+        return 0
+    output_dir = args.output or getcwd()
+    makedirs(output_dir, exist_ok=True)
+    # 各文件共用 seen，其他作业里已经导出过的相同内容写成对那个文件的引用
+    seen = {}
+    for exam_dir in exam_dirs:
+        folder_name = basename(normpath(exam_dir))
+        pathname = path_join(output_dir, f"export_{folder_name}.txt")
+        export_contents(pathname, exam_dir, list_content_dirs(exam_dir), not args.raw, args.full, seen=seen, source=f"export_{folder_name}.txt ")
+        if not args.quiet:
+            print(pathname, file=sys.stderr)
+    return 0
+
+def batch_command(args) -> int:
+    def progress(done: int, total: int, exam_name: str):
+        if exam_name and not args.quiet:
+            print(f"[{done}/{total}] {exam_name}", file=sys.stderr)
+
+    result = batch_export(
+        args.parent_dir, args.output or getcwd(), not args.raw, args.full,
+        max_workers=args.jobs, progress=progress, archive_path=args.archive, force=args.force
+    )
+    print(f"导出 {result.exported} 个，未变化跳过 {result.skipped} 个，失败 {len(result.failed)} 个", file=sys.stderr)
+    for exam_name, message in result.failed:
+        print(f"  {exam_name}: {message}", file=sys.stderr)
+    return 1 if result.failed else 0
+
+def list_command(args) -> int:
+    roots = [root_of(path) for path in args.roots] if args.roots else find_ets_roots(expandvars(r"%APPDATA%"))
+    if not roots:
+        print("未找到ETS文件夹", file=sys.stderr)
+        return 1
+    entries = scan_roots(roots)
+    entries.sort(key=lambda entry: entry.mtime_ns, reverse=True)
+    for entry in entries:
+        print(f"{entry.label}\t{entry.name}\t{datetime.fromtimestamp(entry.mtime_ns // 1_000_000_000)}\t{path_join(entry.root, entry.name)}")
+    return 0
+
+def dedup_command(args) -> int:
+    report = dedup_report(args.parents, measure_memory=not args.no_memory)
+    if not report.files:
+        print("没有找到 content.json", file=sys.stderr)
+        return 1
+    duplicates = report.files - report.unique
+    print(f"content.json {report.files} 个，内容不同的 {report.unique} 个，重复 {duplicates} 个 ({duplicates / report.files:.1%})")
+    print(f"文件大小 {report.bytes / 2 ** 20:.1f} MiB，去重后 {report.unique_bytes / 2 ** 20:.1f} MiB")
+    if not args.no_memory:
+        print(
+            f"解析后约占内存 {report.memory / 2 ** 20:.1f} MiB，去重后 {report.unique_memory / 2 ** 20:.1f} MiB，"
+            f"节省 {(report.memory - report.unique_memory) / 2 ** 20:.1f} MiB"
+        )
+    for digest, paths in report.groups[:args.limit]:
+        print(f"\n{len(paths)} 份相同内容 ({digest[:12]})：")
+        for path in paths:
+            print(f"  {path}")
+    return 0
+
+def search_command(args) -> int:
+    exam_index = ExamIndex()
+    search_index = SearchIndex(exam_index)
+    search_index.set_parents([args.parent_dir])
+    search_index.update(args.parent_dir, *exam_index.refresh(args.parent_dir))
+    hits = search_index.search(args.query, limit=args.limit)
+    for hit in hits:
+        print(f"{hit.score:6.2f}  {hit.exam_name}/{hit.content_name}  {search_index.snippet(hit, args.query)}")
+    return 0 if hits else 1
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="etsviewer", description="不启动图形界面，直接渲染或导出 ETS 作业文件夹")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    mode_parser = argparse.ArgumentParser(add_help=False)
+    mode_parser.add_argument("--raw", action="store_true", help="输出原始 JSON，相当于关闭美观输出")
+    mode_parser.add_argument("--full", action="store_true", help="显示完整答案")
+
+    render_parser = subparsers.add_parser("render", parents=[mode_parser], help="把一个作业文件夹的内容输出到标准输出")
+    render_parser.add_argument("exam_dir")
+    render_parser.add_argument("--item", help="只输出指定条目，可以是 content 目录名或从 1 开始的序号")
+    render_parser.set_defaults(func=render_command)
+
+    export_parser = subparsers.add_parser("export", parents=[mode_parser], help="导出一个作业文件夹或整个父目录")
+    export_parser.add_argument("path", help="作业文件夹，或存放作业文件夹的父目录")
+    export_parser.add_argument("-o", "--output", help="作业文件夹导出到该文件 (默认标准输出)；父目录导出到该目录 (默认当前目录)")
+    export_parser.add_argument("-q", "--quiet", action="store_true", help="不打印已导出的文件")
+    export_parser.set_defaults(func=export_command)
+
+    batch_parser = subparsers.add_parser("batch", parents=[mode_parser], help="用多个进程导出父目录下所有作业，再次运行时只导出有变化的作业")
+    batch_parser.add_argument("parent_dir")
+    batch_parser.add_argument("-o", "--output", help="导出目录 (默认当前目录)，清单文件也保存在这里")
+    batch_parser.add_argument("-j", "--jobs", type=int, help="进程数 (默认 CPU 核数)")
+    batch_parser.add_argument("--archive", help="另外把所有导出文件打包成该 zip 文件")
+    batch_parser.add_argument("--force", action="store_true", help="忽略清单，全部重新导出")
+    batch_parser.add_argument("-q", "--quiet", action="store_true", help="不打印进度")
+    batch_parser.set_defaults(func=batch_command)
+
+    list_parser = subparsers.add_parser("list", help="列出一个或多个父目录下的作业文件夹，按更改时间排序")
+    list_parser.add_argument("roots", nargs="*", help="存放作业文件夹的父目录，不指定则查找 %%APPDATA%% 下所有账号")
+    list_parser.set_defaults(func=list_command)
+
+    dedup_parser = subparsers.add_parser("dedup", help="统计父目录下内容完全相同的 content.json")
+    dedup_parser.add_argument("parents", nargs="+", help="存放作业文件夹的父目录")
+    dedup_parser.add_argument("-n", "--limit", type=int, default=10, help="列出重复最多的前几组")
+    dedup_parser.add_argument("--no-memory", action="store_true", help="不解析文件估算内存，只按字节统计")
+    dedup_parser.set_defaults(func=dedup_command)
+
+    search_parser = subparsers.add_parser("search", help="在父目录下所有作业中全文搜索")
+    search_parser.add_argument("parent_dir")
+    search_parser.add_argument("query")
+    search_parser.add_argument("-n", "--limit", type=int, default=20)
+    search_parser.set_defaults(func=search_command)
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
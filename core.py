@@ -0,0 +1,586 @@
+import re
+import html
+import json
+from os import stat, remove
+from collections import deque
+from functools import lru_cache
+from traceback import print_exc
+from threading import Event, Condition, Thread
+from loader import MISSING, LRUCache, document_cache, content_json_path, list_content_dirs
+from timing import timer
+
+COMMENT_PATTERN = re.compile(r"<!--.*?-->", re.DOTALL)
+TAG_PATTERN = re.compile(r"<[^>]*>")
+BLANK_LINES_PATTERN = re.compile(r"\n\s*\n")
+# 整段对话、短文这些长文本一般只出现一次，缓存它们只会占住内存；题目、答案、句子这些短文本才会重复出现
+MAX_CACHED_LENGTH = 1024
+
+@lru_cache(maxsize=4096)
+def _clean_html_tags(content: str) -> str:
+    # 与旧版相同的顺序：去注释、去标签、实体解码、合并空行。没有注释、实体时跳过对应的步骤
+    if "<!--" in content:
+        content = COMMENT_PATTERN.sub("", content)
+    content = TAG_PATTERN.sub("", content)
+    if "&" in content:
+        content = html.unescape(content)
+    return BLANK_LINES_PATTERN.sub("\n", content).strip()
+
+def clean_html_tags(content: str) -> str:
+    if not content:
+        return ""
+    if len(content) > MAX_CACHED_LENGTH:
+        return _clean_html_tags.__wrapped__(content)
+    return _clean_html_tags(content)
+
+# 格式化分两步：build_*_ir 做清理 HTML、拆分文本这些耗时工作，得到与显示模式无关的中间表示；
+# project_ir 再按显示模式把中间表示拼成文本。中间表示是行的元组，其中可以截断的答案列表用 AnswerGroup 表示
+TRUNCATED_ANSWERS = 3
+
+class AnswerGroup:
+    # 每个答案第一次被显示时才清理，之后缓存，所以默认只显示前几个答案时不用清理全部答案
+    __slots__ = ("options", "build_answer", "note_padding", "answers")
+
+    def __init__(self, options: list, build_answer, note_padding: tuple):
+        self.options = options
+        self.build_answer = build_answer
+        self.note_padding = note_padding
+        self.answers = [None] * len(options)
+
+    def __len__(self) -> int:
+        return len(self.options)
+
+    def answer(self, index: int) -> tuple:
+        lines = self.answers[index]
+        if lines is None:
+            lines = self.answers[index] = self.build_answer(index + 1, self.options[index])
+        return lines
+
+def build_question_ir(json_data) -> tuple:
+    structure_type = json_data.get("structure_type")
+    if structure_type == "collector.role":
+        return build_role_ir(json_data)
+    elif structure_type == "collector.picture":
+        return build_picture_ir(json_data)
+    elif structure_type == "collector.read":
+        return build_read_ir(json_data)
+    elif structure_type == "collector.repeat_essay":
+        return build_repeat_essay_ir(json_data)
+    elif structure_type == "collector.repeat_dialogue":
+        return build_repeat_dialogue_ir(json_data)
+    elif structure_type == "collector.word":
+        return build_word_ir(json_data)
+    elif structure_type == "collector.choose":
+        return build_choose_ir(json_data)
+    return (json.dumps(json_data, indent=4, ensure_ascii=False),)
+
+def project_ir(ir: tuple, show_full_answers: bool) -> str:
+    result = []
+    for line in ir:
+        if type(line) is str:
+            result.append(line)
+            continue
+        shown = len(line) if show_full_answers else min(len(line), TRUNCATED_ANSWERS)
+        for index in range(shown):
+            result.extend(line.answer(index))
+        if not show_full_answers and len(line) > TRUNCATED_ANSWERS:
+            result.append(f"... 还有{len(line)-TRUNCATED_ANSWERS}个答案未显示（可勾选显示完整答案）")
+            result.extend(line.note_padding)
+    return "\n".join(result)
+
+def ir_size(ir: tuple) -> int:
+    # 未清理的答案按原始文本长度估算，只是估算，不是字符串的值 (null 等) 不计入，格式化能处理的数据这里不能出错
+    size = 0
+    for line in ir:
+        if type(line) is str:
+            size += len(line)
+        else:
+            for option in line.options:
+                value = option.get("value") if isinstance(option, dict) else None
+                if isinstance(value, str):
+                    size += len(value)
+    return size
+
+def format_question_json(json_data, show_full_answers=True):
+    return project_ir(build_question_ir(json_data), show_full_answers)
+
+def build_role_ir(json_data) -> tuple:
+    result = []
+    info = json_data.get("info", {})
+    questions = info.get("question", [])
+    if "value" in info and info["value"]:
+        cleaned_dialog = clean_html_tags(info["value"])
+        result.append("==对话内容==")
+        result.append(cleaned_dialog)
+        result.append("")
+    for idx, question in enumerate(questions, 1):
+        raw_ask = question.get("ask", "")
+        cleaned_ask = clean_html_tags(raw_ask)
+        cleaned_ask = re.sub(r"ets_th\d+\s*", "", cleaned_ask)
+        ask_text = cleaned_ask.strip()
+        result.append(f"题目 {idx}：{ask_text}")
+        if "keywords" in question and question["keywords"]:
+            result.append(f"关键词：{question['keywords']}")
+        std_options = question.get("std", [])
+        if std_options:
+            result.append("答案选项：")
+            result.append(AnswerGroup(std_options, build_role_answer, ()))
+            result.append("")
+    return tuple(result)
+
+def build_role_answer(i: int, opt: dict) -> tuple:
+    raw_value = opt.get('value', '')
+    cleaned_value = clean_html_tags(raw_value)
+    return (f"{i}. {cleaned_value.strip()}",)
+
+def build_picture_ir(json_data) -> tuple:
+    result = []
+    info = json_data.get("info", {})
+    if "topic" in info and info["topic"]:
+        result.append(f"==主题：{info['topic']}==")
+        result.append("")
+    if "image" in info and info["image"]:
+        result.append(f"图片：{info['image']}")
+        result.append("")
+    if "value" in info and info["value"]:
+        cleaned_text = clean_html_tags(info["value"])
+        result.append("==内容描述==")
+        result.append(cleaned_text.replace("</br>", "\n").strip())
+        result.append("")
+    if "keypoint" in info and info["keypoint"]:
+        cleaned_keypoints = clean_html_tags(info["keypoint"])
+        result.append("==核心要点==")
+        points = re.split(r"(?=\d+\. )", cleaned_keypoints)
+        for point in [p.strip() for p in points if p.strip()]:
+            result.append(point)
+        result.append("")
+    std_options = info.get("std", [])
+    if std_options:
+        result.append("==参考答案==")
+        result.append(AnswerGroup(std_options, build_picture_answer, ("",)))
+    return tuple(result)
+
+def build_picture_answer(i: int, opt: dict) -> tuple:
+    cleaned_answer = clean_html_tags(opt.get("value", ""))
+    cleaned_answer = re.sub(r"\n\s*\n", "\n", cleaned_answer).strip()
+    return (f"答案 {i}：", cleaned_answer, "")
+
+def build_choose_ir(json_data) -> tuple:
+    result = []
+    info = json_data.get("info", {})
+    result.append("==选择题==")
+    result.append("")
+    st_nr = clean_html_tags(info.get("st_nr", ""))
+    if st_nr:
+        result.append("题目描述：")
+        result.append(st_nr)
+        result.append("")
+    xtlist = info.get("xtlist", [])
+    is_single_question = len(xtlist) == 1
+    answer_summary = []
+    for idx, xt_item in enumerate(xtlist, 1):
+        answer = xt_item.get("answer", "")
+        if answer:
+            if is_single_question:
+                answer_summary.append(f"正确答案：{answer}")
+            else:
+                answer_summary.append(f"第 {idx} 题：{answer}")
+    if answer_summary:
+        if not is_single_question:
+            result.append("正确答案汇总：")
+        result.extend(answer_summary)
+        result.append("")
+    for idx, xt_item in enumerate(xtlist, 1):
+        xt_nr = clean_html_tags(xt_item.get("xt_nr", ""))
+        if xt_nr:
+            if is_single_question:
+                result.append(f"{xt_nr}")
+            else:
+                result.append(f"第 {idx} 题：{xt_nr}")
+            result.append("")
+        xxlist = xt_item.get("xxlist", [])
+        if xxlist:
+            result.append("选项：")
+            for option in xxlist:
+                xx_mc = option.get("xx_mc", "")
+                xx_nr = clean_html_tags(option.get("xx_nr", ""))
+                if xx_mc and xx_nr:
+                    result.append(f"  {xx_mc}. {xx_nr}")
+            result.append("")
+    return tuple(result)
+
+def build_read_ir(json_data) -> tuple:
+    result = []
+    info = json_data.get("info", {})
+    result.append("==阅读材料==")
+    result.append("")
+    if "value" in info and info["value"]:
+        cleaned_text = clean_html_tags(info["value"])
+        formatted_text = cleaned_text.replace("</br>", "\n").strip()
+        result.append(formatted_text)
+        result.append("")
+    return tuple(result)
+
+def build_repeat_essay_ir(json_data) -> tuple:
+    result = []
+    info = json_data.get("info", {})
+    result.append("==问答短文==")
+    result.append("")
+    if "value" in info and info["value"]:
+        cleaned_text = clean_html_tags(info["value"])
+        result.append(cleaned_text.replace("</br>", "\n").strip())
+        result.append("")
+    sublist = info.get("sublist", [])
+    if sublist:
+        result.append("==参考翻译==")
+        for item in sublist:
+            if "text" in item and "translate" in item:
+                result.append(f"{clean_html_tags(item['text'])}")
+                result.append(f"  → {clean_html_tags(item['translate'])}")
+                result.append("")
+    return tuple(result)
+
+def build_repeat_dialogue_ir(json_data) -> tuple:
+    result = []
+    info = json_data.get("info", {})
+    result.append("==对话内容==")
+    result.append("")
+    if "value" in info and info["value"]:
+        cleaned_text = clean_html_tags(info["value"])
+        result.append(cleaned_text.replace("</br>", "\n").strip())
+        result.append("")
+    sublist = info.get("sublist", [])
+    if sublist:
+        result.append("==详细对话==")
+        for item in sublist:
+            if "role" in item and "text" in item:
+                result.append(f"{item['role']}: {clean_html_tags(item['text'])}")
+                if "translate" in item:
+                    result.append(f"  → {clean_html_tags(item['translate'])}")
+                result.append("")
+    return tuple(result)
+
+def build_word_ir(json_data) -> tuple:
+    result = []
+    info = json_data.get("info", {})
+    result.append("==词汇问答==")
+    result.append("")
+    value_content = clean_html_tags(info.get("value", ""))
+    translate_content = clean_html_tags(info.get("translate", ""))
+    if value_content and translate_content and not re.search(r"[?]", value_content):
+        result.append("原文内容：")
+        result.append(value_content)
+        result.append("")
+        result.append("参考翻译：")
+        result.append(translate_content)
+        result.append("")
+    else:
+        if value_content:
+            result.append("原文内容：")
+            items = re.split(r"(?=What|Who|How|Why|Where|When|Which)", value_content)
+            for item in [i.strip() for i in items if i.strip()]:
+                result.append(item)
+            result.append("")
+        if translate_content:
+            result.append("参考翻译：")
+            trans_items = re.split(r"(?=(What|Who|How|Why|Where|When|Which|A strong wind) )", translate_content)
+            for i in range(0, len(trans_items), 2):
+                if i+1 < len(trans_items):
+                    question_part = trans_items[i+1].strip()
+                    answer_part = trans_items[i].strip()
+                    if question_part:
+                        combined = f"{question_part}{answer_part}"
+                        processed_text = re.sub(r"([。！？])", r"\1\n", combined)
+                        result.append(processed_text.strip())
+                        result.append("")
+    return tuple(result)
+
+# 各题型的格式化函数实际读取的字段：None 表示保留整个值，[...] 表示按元素裁剪的列表
+RECORD_FIELDS = {
+    "collector.role": {"value": None, "question": [{"ask": None, "keywords": None, "std": [{"value": None}]}]},
+    "collector.picture": {"topic": None, "image": None, "value": None, "keypoint": None, "std": [{"value": None}]},
+    "collector.read": {"value": None},
+    "collector.repeat_essay": {"value": None, "sublist": [{"text": None, "translate": None}]},
+    "collector.repeat_dialogue": {"value": None, "sublist": [{"role": None, "text": None, "translate": None}]},
+    "collector.word": {"value": None, "translate": None},
+    "collector.choose": {"st_nr": None, "xtlist": [{"answer": None, "xt_nr": None, "xxlist": [{"xx_mc": None, "xx_nr": None}]}]},
+}
+
+class SlimRecord:
+    # 美观输出只需要的精简记录，音频、评分等用不到的字段不保留。
+    # 提供与 dict 相同的 get()，格式化函数不用区分传入的是记录还是完整文档
+    __slots__ = ("structure_type", "info")
+
+    def __init__(self, structure_type: str, info):
+        self.structure_type = structure_type
+        self.info = info
+
+    def get(self, key: str, default=None):
+        if key == "structure_type":
+            return self.structure_type
+        if key == "info" and self.info is not MISSING:
+            return self.info
+        return default
+
+def prune_fields(value, fields):
+    # 类型与预期不符的值原样保留，格式化结果 (包括出错的情况) 与完整文档一致
+    if isinstance(fields, list) and isinstance(value, list):
+        return [prune_fields(item, fields[0]) for item in value]
+    if isinstance(fields, dict) and isinstance(value, dict):
+        return {key: prune_fields(value[key], fields[key]) for key in fields if key in value}
+    return value
+
+def slim_record(document):
+    # 未知题型按原样输出 JSON，只能保留完整文档
+    fields = RECORD_FIELDS.get(document.get("structure_type")) if isinstance(document, dict) else None
+    if fields is None:
+        return document
+    info = document.get("info", MISSING)
+    return SlimRecord(document["structure_type"], MISSING if info is MISSING else prune_fields(info, fields))
+
+def record_size(value) -> int:
+    # 按字符串长度加上每个容器的固定开销估算
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, SlimRecord):
+        value = value.info
+    if isinstance(value, dict):
+        return 64 + sum(len(key) + record_size(item) for key, item in value.items())
+    if isinstance(value, list):
+        return 64 + sum(record_size(item) for item in value)
+    return 16
+
+record_cache = LRUCache(max_entries=1024, max_bytes=16 * 1024 * 1024)
+render_cache = LRUCache(max_entries=512, max_bytes=32 * 1024 * 1024)
+ir_cache = LRUCache(max_entries=512, max_bytes=32 * 1024 * 1024)
+raw_json_encoder = json.JSONEncoder(indent=4, ensure_ascii=False)
+EXPORT_BUFFER_SIZE = 256 * 1024
+FIRST_CHUNK_SIZE = 32 * 1024
+FILL_CHUNK_SIZE = 256 * 1024
+
+# 中间表示和渲染结果都以内容哈希为键，内容相同的 content.json 共用同一份。
+# load_document 只在缓存未命中时才调用，缓存了中间表示或渲染结果时不需要解析后的文档
+def render_key(digest: str, pretty_print_enabled: bool, show_full_answers: bool) -> tuple:
+    # 非美观输出时与 show_full_answers 无关，统一成同一个键
+    return digest, pretty_print_enabled, pretty_print_enabled and show_full_answers
+
+def digest_ir(digest: str, load_document) -> tuple:
+    ir = ir_cache.lookup(digest, None)
+    if ir is MISSING:
+        document = load_document()
+        with timer.stage("format"):
+            ir = build_question_ir(document)
+        ir_cache.put(digest, None, ir_size(ir), ir)
+    return ir
+
+def render_digest(digest: str, load_document, pretty_print_enabled: bool, show_full_answers: bool) -> str:
+    key = render_key(digest, pretty_print_enabled, show_full_answers)
+    formatted_content = render_cache.lookup(key, None)
+    if formatted_content is MISSING:
+        if pretty_print_enabled:
+            # 切换“显示完整答案”时只需要重新拼接缓存的中间表示
+            ir = digest_ir(digest, load_document)
+            with timer.stage("project"):
+                formatted_content = project_ir(ir, show_full_answers)
+        else:
+            document = load_document()
+            with timer.stage("format"):
+                formatted_content = json.dumps(document, indent=4, ensure_ascii=False)
+        render_cache.put(key, None, len(formatted_content), formatted_content)
+    return formatted_content
+
+def digest_record(digest: str, document):
+    record = record_cache.lookup(digest, None)
+    if record is MISSING:
+        record = slim_record(document)
+        record_cache.put(digest, None, record_size(record), record)
+    return record
+
+def content_record(path: str, stat_result=None) -> tuple:
+    # 返回 (内容哈希, 精简记录)。完整文档只在原始 JSON 模式下才放进解析缓存
+    if stat_result is None:
+        stat_result = stat(path)
+    digest = document_cache.known_digest(path, stat_result)
+    record = MISSING if digest is None else record_cache.lookup(digest, None)
+    if record is MISSING:
+        digest, document = document_cache.entry(path, stat_result, keep=False)
+        record = digest_record(digest, document)
+    return digest, record
+
+def content_source(path: str, stat_result, pretty_print_enabled: bool) -> tuple:
+    # 返回 (内容哈希, load_document)。路径没有记录时读一次文件同时得到哈希和解析结果，
+    # load_document 直接用这次的结果，不会为了哈希和解析各读一遍
+    digest = document_cache.known_digest(path, stat_result)
+    if digest is not None:
+        if pretty_print_enabled:
+            return digest, lambda: content_record(path, stat_result)[1]
+        return digest, lambda: document_cache.get(path, stat_result)
+    digest, document = document_cache.entry(path, stat_result, keep=not pretty_print_enabled)
+    if pretty_print_enabled:
+        return digest, lambda: digest_record(digest, document)
+    return digest, lambda: document
+
+def content_ir(path: str, stat_result=None) -> tuple:
+    if stat_result is None:
+        stat_result = stat(path)
+    return digest_ir(*content_source(path, stat_result, True))
+
+def is_rendered(path: str, pretty_print_enabled: bool, show_full_answers: bool) -> bool:
+    digest = document_cache.known_digest(path)
+    return digest is not None and render_key(digest, pretty_print_enabled, show_full_answers) in render_cache
+
+def render_content(path: str, pretty_print_enabled: bool, show_full_answers: bool) -> str:
+    return render_digest(*content_source(path, stat(path), pretty_print_enabled), pretty_print_enabled, show_full_answers)
+
+def render_source_chunks(digest: str, load_document, pretty_print_enabled: bool, show_full_answers: bool):
+    # 出错时在这里就抛出异常，而不是在迭代文本块时
+    if pretty_print_enabled:
+        return (render_digest(digest, load_document, True, show_full_answers),)
+    formatted_content = render_cache.lookup(render_key(digest, False, False), None)
+    if formatted_content is not MISSING:
+        return (formatted_content,)
+    # 原始 JSON 逐块编码，不在内存里拼出完整字符串，也不挤占渲染缓存
+    return raw_json_encoder.iterencode(load_document())
+
+def render_content_chunks(path: str, pretty_print_enabled: bool, show_full_answers: bool):
+    return render_source_chunks(*content_source(path, stat(path), pretty_print_enabled), pretty_print_enabled, show_full_answers)
+
+def iter_text_chunks(text: str, first_size: int = FIRST_CHUNK_SIZE, chunk_size: int = FILL_CHUNK_SIZE):
+    # 在行边界处切块：第一块足够填满一屏，先显示出来，其余的在空闲时逐块追加
+    start, size = 0, first_size
+    while start < len(text):
+        end = start + size
+        if end < len(text):
+            newline = text.rfind("\n", start, end)
+            if newline > start:
+                end = newline + 1
+        yield text[start:end]
+        start = end
+        size = chunk_size
+
+def iter_export_chunks(dir_path: str, content_names: list, pretty_print_enabled: bool, show_full_answers: bool, progress=None, seen: dict = None, source: str = "", errors: list = None):
+    # 内容相同的条目只导出一次，之后写成对第一次出现位置的引用。seen 为 内容哈希 -> 位置，
+    # 多个导出文件共用同一个 seen 时可以跨文件引用，此时 source 是当前文件名。
+    # 无法读取或解析的条目跳过，给出 errors 时把 "content 目录名: 错误" 追加进去
+    seen = {} if seen is None else seen
+    exported = 0
+    for index, content_name in enumerate(content_names, 1):
+        path = content_json_path(dir_path, content_name)
+        try:
+            digest, load_document = content_source(path, stat(path), pretty_print_enabled)
+            chunks = None if digest in seen else render_source_chunks(digest, load_document, pretty_print_enabled, show_full_answers)
+        except (ValueError, FileNotFoundError) as e:
+            digest = None
+            if errors is not None:
+                errors.append(f"{content_name}: {str(e)}")
+        if digest is not None:
+            exported += 1
+            yield f"--- 条目 {exported}: {content_name} ---\n"
+            if chunks is None:
+                yield f"（与{seen[digest]}内容相同）"
+            else:
+                seen[digest] = f"{source}条目 {exported}: {content_name} "
+                yield from chunks
+            yield "\n\n"
+        if progress is not None:
+            progress(index, len(content_names))
+
+def write_export(file, dir_path: str, content_names: list, pretty_print_enabled: bool, show_full_answers: bool, progress=None, cancel_event: Event = None, seen: dict = None, source: str = "", errors: list = None) -> bool:
+    for chunk in iter_export_chunks(dir_path, content_names, pretty_print_enabled, show_full_answers, progress, seen, source, errors):
+        if cancel_event is not None and cancel_event.is_set():
+            return False
+        file.write(chunk)
+    return True
+
+def export_contents(pathname: str, dir_path: str, content_names: list, pretty_print_enabled: bool, show_full_answers: bool, progress=None, cancel_event: Event = None, seen: dict = None, source: str = "", errors: list = None) -> bool:
+    with open(pathname, "w", encoding="utf-8", buffering=EXPORT_BUFFER_SIZE) as file:
+        finished = write_export(file, dir_path, content_names, pretty_print_enabled, show_full_answers, progress, cancel_event, seen, source, errors)
+    if not finished:
+        remove(pathname)
+    return finished
+
+def cache_stats() -> dict:
+    return {"document": document_cache.stats(), "record": record_cache.stats(), "ir": ir_cache.stats(), "render": render_cache.stats()}
+
+class Prefetcher:
+    # 空闲时预先渲染相邻条目和相邻作业的第一个条目。前台请求开始时调用 pause()，
+    # 新的 schedule() 会替换还没执行的旧计划；每轮计划按 content.json 大小扣减内存预算
+    def __init__(self, budget_bytes: int = 8 * 1024 * 1024, max_tracked: int = 4096):
+        self.budget_bytes = budget_bytes
+        self.budget_left = budget_bytes
+        self.max_tracked = max_tracked
+        self.condition = Condition()
+        self.tasks = deque()
+        self.paused = False
+        self.prefetched = set()
+        self.counters = {"scheduled": 0, "rendered": 0, "over_budget": 0, "requests": 0, "hits": 0}
+        self.thread = Thread(target=self.run, name="prefetcher", daemon=True)
+        self.thread.start()
+
+    def pause(self):
+        with self.condition:
+            self.paused = True
+            self.tasks.clear()
+
+    def schedule(self, tasks: list, pretty_print_enabled: bool, show_full_answers: bool):
+        # tasks 按优先级排列，每项为 (作业文件夹, content 目录名)，目录名为 None 表示该作业的第一个条目
+        with self.condition:
+            self.tasks = deque((dir_path, content_name, pretty_print_enabled, show_full_answers) for dir_path, content_name in tasks)
+            self.budget_left = self.budget_bytes
+            self.paused = False
+            self.counters["scheduled"] += len(tasks)
+            self.condition.notify()
+
+    def render(self, path: str, pretty_print_enabled: bool, show_full_answers: bool) -> str:
+        # 前台渲染入口，用来统计预取命中率；prefetched 以路径记录
+        key = (path, pretty_print_enabled, pretty_print_enabled and show_full_answers)
+        with self.condition:
+            self.counters["requests"] += 1
+            prefetched = key in self.prefetched
+            self.prefetched.discard(key)
+        if prefetched and is_rendered(path, pretty_print_enabled, show_full_answers):
+            with self.condition:
+                self.counters["hits"] += 1
+        return render_content(path, pretty_print_enabled, show_full_answers)
+
+    def stats(self) -> dict:
+        with self.condition:
+            stats = dict(self.counters)
+        stats["hit_rate"] = stats["hits"] / stats["requests"] if stats["requests"] else 0
+        return stats
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.paused or not self.tasks:
+                    self.condition.wait()
+                task = self.tasks.popleft()
+            try:
+                self.prefetch(*task)
+            except (json.JSONDecodeError, OSError):
+                pass
+            except Exception:
+                # 编码错误、不是对象的 JSON 等：记录下来，预取线程继续运行
+                print_exc()
+
+    def prefetch(self, dir_path: str, content_name: str, pretty_print_enabled: bool, show_full_answers: bool):
+        if content_name is None:
+            content_names = list_content_dirs(dir_path)
+            if not content_names:
+                return
+            content_name = content_names[0]
+        path = content_json_path(dir_path, content_name)
+        key = (path, pretty_print_enabled, pretty_print_enabled and show_full_answers)
+        if is_rendered(path, pretty_print_enabled, show_full_answers):
+            return
+        size = stat(path).st_size
+        with self.condition:
+            if size > self.budget_left:
+                self.counters["over_budget"] += 1
+                return
+            self.budget_left -= size
+        render_content(path, pretty_print_enabled, show_full_answers)
+        with self.condition:
+            if len(self.prefetched) >= self.max_tracked:
+                self.prefetched.clear()
+            self.prefetched.add(key)
+            self.counters["rendered"] += 1
@@ -0,0 +1,60 @@
+import sys
+import json
+from collections import namedtuple
+from os.path import join as path_join
+from loader import content_digest, content_json_path, list_content_dirs, list_exam_dirs, read_json_file
+
+# groups 是重复的内容，每项为 (内容哈希, 路径列表)，按份数从多到少排列
+DedupReport = namedtuple("DedupReport", ["files", "unique", "bytes", "unique_bytes", "memory", "unique_memory", "groups"])
+
+def deep_size(obj, seen: set = None) -> int:
+    # 解析结果大致占用的内存，同一个对象只算一次
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, list):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+def dedup_report(parents: list, measure_memory: bool = True) -> DedupReport:
+    # 只按字节内容分组；每组只解析一份来估算内存，损坏的文件不计入内存
+    paths_by_digest, sizes = {}, {}
+    for parent in parents:
+        for exam_name in list_exam_dirs(parent):
+            exam_dir = path_join(parent, exam_name)
+            for content_dir in list_content_dirs(exam_dir):
+                path = content_json_path(exam_dir, content_dir)
+                try:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                except FileNotFoundError:
+                    continue
+                digest = content_digest(data)
+                paths_by_digest.setdefault(digest, []).append(path)
+                sizes[digest] = len(data)
+    memory = unique_memory = 0
+    if measure_memory:
+        for digest, paths in paths_by_digest.items():
+            try:
+                size = deep_size(read_json_file(paths[0]))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            memory += size * len(paths)
+            unique_memory += size
+    groups = sorted(
+        ((digest, paths) for digest, paths in paths_by_digest.items() if len(paths) > 1),
+        key=lambda group: len(group[1]), reverse=True
+    )
+    return DedupReport(
+        sum(len(paths) for paths in paths_by_digest.values()),
+        len(paths_by_digest),
+        sum(sizes[digest] * len(paths) for digest, paths in paths_by_digest.items()),
+        sum(sizes.values()),
+        memory,
+        unique_memory,
+        groups,
+    )
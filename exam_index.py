@@ -0,0 +1,122 @@
+import json
+import sqlite3
+from os import makedirs, environ
+from os.path import dirname, expanduser, join as path_join
+from threading import Lock
+from collections import namedtuple
+from loader import content_json_path, list_content_dirs, read_json_file
+from scanner import scan_exam_dirs
+
+INDEX_VERSION = 1
+
+ExamRecord = namedtuple("ExamRecord", ["name", "mtime_ns", "content_dirs", "structure_types", "errors"])
+
+def default_index_path() -> str:
+    base_dir = environ.get("APPDATA") or expanduser(path_join("~", ".cache"))
+    return path_join(base_dir, "ETSViewer", "index.sqlite3")
+
+def index_exam_dir(exam_dir: str, name: str, mtime_ns: int) -> ExamRecord:
+    content_dirs = list_content_dirs(exam_dir)
+    structure_types, errors = [], []
+    for content_dir in content_dirs:
+        try:
+            document = read_json_file(content_json_path(exam_dir, content_dir))
+        except (ValueError, FileNotFoundError) as e:
+            # ValueError 包括 JSON 格式错误和编码错误
+            structure_types.append(None)
+            errors.append(f"{content_dir}: {str(e)}")
+            continue
+        structure_types.append(document.get("structure_type") if isinstance(document, dict) else None)
+    return ExamRecord(name, mtime_ns, content_dirs, structure_types, errors)
+
+class ExamIndex:
+    # 持久化的作业文件夹索引，只有 mtime 变化的文件夹才会重新读取
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or default_index_path()
+        makedirs(dirname(self.db_path), exist_ok=True)
+        self.lock = Lock()
+        self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self.lock, self.connection:
+            if self.connection.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+                self.connection.execute("DROP TABLE IF EXISTS exams")
+                self.connection.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS exams ("
+                "parent TEXT NOT NULL, name TEXT NOT NULL, mtime_ns INTEGER NOT NULL, "
+                "content_dirs TEXT NOT NULL, structure_types TEXT NOT NULL, errors TEXT NOT NULL, "
+                "PRIMARY KEY (parent, name))"
+            )
+            # 搜索索引的词频，以各条目 content.json 的 (mtime, 大小) 为签名，启动时不用重新读取和分词
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS search_docs ("
+                "parent TEXT NOT NULL, name TEXT NOT NULL, signature TEXT NOT NULL, documents TEXT NOT NULL, "
+                "PRIMARY KEY (parent, name))"
+            )
+
+    def load(self, parent: str) -> list:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT name, mtime_ns, content_dirs, structure_types, errors FROM exams WHERE parent = ?", (parent,)
+            ).fetchall()
+        return [
+            ExamRecord(name, mtime_ns, json.loads(content_dirs), json.loads(structure_types), json.loads(errors))
+            for name, mtime_ns, content_dirs, structure_types, errors in rows
+        ]
+
+    def refresh(self, parent: str, scanned=None):
+        # 返回 (全部记录, 新增或变化的文件夹名, 已删除的文件夹名)。有文件夹需要重新读取时，
+        # 先以同样的参数调用 scanned，这时变化的文件夹只有名称和 mtime，列表不用等所有条目解析完才显示
+        indexed = {record.name: record for record in self.load(parent)}
+        records, stale = [], []
+        for name, mtime_ns in scan_exam_dirs(parent):
+            record = indexed.pop(name, None)
+            if record is None or record.mtime_ns != mtime_ns:
+                stale.append(len(records))
+                record = ExamRecord(name, mtime_ns, [], [], [])
+            records.append(record)
+        removed = list(indexed)
+        changed = [records[i].name for i in stale]
+        if scanned is not None and stale:
+            scanned(list(records), changed, removed)
+        for i in stale:
+            records[i] = index_exam_dir(path_join(parent, records[i].name), records[i].name, records[i].mtime_ns)
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO exams VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (parent, record.name, record.mtime_ns, json.dumps(record.content_dirs),
+                     json.dumps(record.structure_types), json.dumps(record.errors, ensure_ascii=False))
+                    for record in (records[i] for i in stale)
+                ]
+            )
+            self.connection.executemany("DELETE FROM exams WHERE parent = ? AND name = ?", [(parent, name) for name in removed])
+        return records, changed, removed
+
+    def load_search_docs(self, parent: str) -> dict:
+        # 返回 作业文件夹名 -> (签名, [(条目序号, content 目录名, {词: 词频}), ...])
+        with self.lock:
+            rows = self.connection.execute("SELECT name, signature, documents FROM search_docs WHERE parent = ?", (parent,)).fetchall()
+        return {name: (signature, json.loads(documents)) for name, signature, documents in rows}
+
+    def save_search_docs(self, parent: str, entries: list, removed: list):
+        # entries 为 (作业文件夹名, 签名, 文档列表)
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO search_docs VALUES (?, ?, ?, ?)",
+                [(parent, name, signature, json.dumps(documents, ensure_ascii=False)) for name, signature, documents in entries]
+            )
+            self.connection.executemany("DELETE FROM search_docs WHERE parent = ? AND name = ?", [(parent, name) for name in removed])
+
+    def get_setting(self, key: str, default: str = None) -> str:
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_setting(self, key: str, value: str):
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO settings VALUES (?, ?)", (key, value))
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
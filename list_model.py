@@ -0,0 +1,95 @@
+import re
+from array import array
+from datetime import datetime
+from os.path import join as path_join
+
+DIGITS_PATTERN = re.compile(r"(\d+)")
+SORT_ORDERS = ("mtime_desc", "mtime_asc", "name_asc", "name_desc")
+
+def natural_key(name: str) -> tuple:
+    return tuple(int(part) if part.isdigit() else part for part in DIGITS_PATTERN.split(name))
+
+class ExamListModel:
+    # 作业文件夹列表的数据模型，不依赖 wx。名称存在 list，mtime 和所属根目录存在 array，
+    # 各排序方式的下标排列在第一次用到时算好并缓存，过滤和换排序都只重建 view 这个下标数组
+    def __init__(self, sort_order: str = "mtime_desc"):
+        self.roots = []
+        self.names = []
+        self.mtimes = array("q")
+        self.root_ids = array("H")
+        self.orders = {}
+        self.sort_order = sort_order
+        self.filter_text = ""
+        self.view = array("l")
+        self.rows = {}
+
+    def set_records(self, root_records: list):
+        # root_records 是 (EtsRoot, records) 列表，records 是 ExamRecord 或 (name, mtime_ns) 序列
+        self.roots = [root for root, _ in root_records]
+        self.names = [record[0] for _, records in root_records for record in records]
+        self.mtimes = array("q", (record[1] for _, records in root_records for record in records))
+        self.root_ids = array("H", (root_id for root_id, (_, records) in enumerate(root_records) for _ in records))
+        self.orders.clear()
+        self.update_view()
+
+    def set_sort_order(self, sort_order: str):
+        if sort_order not in SORT_ORDERS:
+            raise ValueError(f"unknown sort order: {sort_order}")
+        self.sort_order = sort_order
+        self.update_view()
+
+    def set_filter(self, filter_text: str):
+        self.filter_text = filter_text.strip().lower()
+        self.update_view()
+
+    def order(self, sort_order: str) -> array:
+        if sort_order not in self.orders:
+            indices = range(len(self.names))
+            if sort_order == "mtime_desc":
+                permutation = sorted(indices, key=self.mtimes.__getitem__, reverse=True)
+            elif sort_order == "mtime_asc":
+                permutation = sorted(indices, key=self.mtimes.__getitem__)
+            else:
+                name_keys = [natural_key(name) for name in self.names]
+                permutation = sorted(indices, key=name_keys.__getitem__, reverse=sort_order == "name_desc")
+            self.orders[sort_order] = array("l", permutation)
+        return self.orders[sort_order]
+
+    def update_view(self):
+        permutation = self.order(self.sort_order)
+        if self.filter_text:
+            names = self.names
+            filter_text = self.filter_text
+            self.view = array("l", (index for index in permutation if filter_text in names[index].lower()))
+        else:
+            self.view = permutation
+        self.rows = {}
+
+    def __len__(self) -> int:
+        return len(self.view)
+
+    def name(self, row: int) -> str:
+        return self.names[self.view[row]]
+
+    def mtime_ns(self, row: int) -> int:
+        return self.mtimes[self.view[row]]
+
+    def mtime_text(self, row: int) -> str:
+        return str(datetime.fromtimestamp(self.mtime_ns(row) // 1_000_000_000))
+
+    def root(self, row: int):
+        return self.roots[self.root_ids[self.view[row]]]
+
+    def path(self, row: int) -> str:
+        return self.index_path(self.view[row])
+
+    def index_path(self, index: int) -> str:
+        return path_join(self.roots[self.root_ids[index]].path, self.names[index])
+
+    def view_paths(self) -> list:
+        return [self.index_path(index) for index in self.view]
+
+    def row_of(self, path: str) -> int:
+        if not self.rows and self.view:
+            self.rows = {self.index_path(index): row for row, index in enumerate(self.view)}
+        return self.rows.get(path, -1)
@@ -0,0 +1,305 @@
+import re
+import json
+from mmap import mmap, ACCESS_READ
+from hashlib import blake2b
+from os import scandir, stat, fstat, environ
+from os.path import join as path_join
+from traceback import print_exc
+from threading import Lock, Condition, Thread
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from timing import timer
+
+MAX_LOAD_WORKERS = 8
+MMAP_THRESHOLD = 1024 * 1024
+EXAM_DIR_PATTERN = re.compile(r".*\d+")
+
+def list_dirs(dir_path: str, accept) -> list:
+    # 先按名称过滤，只对名称匹配的条目判断是否为文件夹
+    with timer.stage("scan"), scandir(dir_path) as entries:
+        return [entry.name for entry in entries if accept(entry.name) and entry.is_dir()]
+
+def list_exam_dirs(dir_path: str) -> list:
+    return list_dirs(dir_path, EXAM_DIR_PATTERN.match)
+
+def list_content_dirs(dir_path: str) -> list:
+    return list_dirs(dir_path, lambda dir_name: dir_name.startswith("content"))
+
+def content_json_path(dir_path: str, dir_name: str) -> str:
+    return path_join(dir_path, dir_name, "content.json")
+
+# accepts_buffer 为真的解码器直接解析 bytes，大文件用 mmap 映射后以 memoryview 交给它；
+# 否则先按 utf-8 解码成 str (与原来的文本方式一致，json.loads 直接收 bytes 时会自动识别 BOM 和 utf-16)
+JsonDecoder = namedtuple("JsonDecoder", ["name", "loads", "accepts_buffer"])
+JSON_DECODERS = {"json": JsonDecoder("json", json.loads, False)}
+try:
+    import orjson
+    JSON_DECODERS["orjson"] = JsonDecoder("orjson", orjson.loads, True)
+except ImportError:
+    pass
+
+def default_json_decoder() -> JsonDecoder:
+    # 默认用标准库 json，装了 orjson 时优先用 orjson；可以用环境变量 ETSVIEWER_JSON_DECODER 指定
+    name = environ.get("ETSVIEWER_JSON_DECODER")
+    if name in JSON_DECODERS:
+        return JSON_DECODERS[name]
+    return JSON_DECODERS.get("orjson", JSON_DECODERS["json"])
+
+json_decoder = default_json_decoder()
+
+def json_decoder_name() -> str:
+    return json_decoder.name
+
+def set_json_decoder(name: str):
+    global json_decoder
+    if name not in JSON_DECODERS:
+        raise ValueError(f"unknown json decoder: {name}")
+    json_decoder = JSON_DECODERS[name]
+
+def read_json_text(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        content_text = f.read()
+    return json.loads(content_text)
+
+def content_digest(data) -> str:
+    return blake2b(data, digest_size=16).hexdigest()
+
+def file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        if fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+            with timer.stage("read"):
+                mapped = mmap(f.fileno(), 0, access=ACCESS_READ)
+            with mapped, memoryview(mapped) as view:
+                return content_digest(view)
+        with timer.stage("read"):
+            data = f.read()
+    return content_digest(data)
+
+def read_json_file(path: str, decoder: JsonDecoder = None):
+    return load_json_file(path, decoder)[1]
+
+def load_json_file(path: str, decoder: JsonDecoder = None, shared=None) -> tuple:
+    # 返回 (内容哈希, 解析结果)。只有给出 shared 时才计算哈希，否则哈希为 None：
+    # shared(digest) 可以返回之前解析过的相同内容，找到时跳过解码。
+    # 解析失败时用原来的文本方式再读一次，这样报错信息与以前完全一致，
+    # orjson 不支持而标准库支持的内容 (如 NaN) 也能正常打开
+    decoder = decoder or json_decoder
+    try:
+        with open(path, "rb") as f:
+            if decoder.accepts_buffer and fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+                with timer.stage("read"):
+                    mapped = mmap(f.fileno(), 0, access=ACCESS_READ)
+                with mapped, memoryview(mapped) as view:
+                    return load_json_data(view, decoder, shared)
+            with timer.stage("read"):
+                data = f.read()
+        return load_json_data(data, decoder, shared)
+    except ValueError:
+        pass
+    document = read_json_text(path)
+    if shared is None:
+        return None, document
+    with open(path, "rb") as f:
+        return content_digest(f.read()), document
+
+def load_json_data(data, decoder: JsonDecoder, shared) -> tuple:
+    digest = None if shared is None else content_digest(data)
+    document = MISSING if digest is None else shared(digest)
+    if document is MISSING:
+        if not decoder.accepts_buffer:
+            data = str(data, "utf-8")
+        with timer.stage("json.loads"):
+            document = decoder.loads(data)
+    return digest, document
+
+MISSING = object()
+
+class LRUCache:
+    # 进程级 LRU，每个条目带一个签名 (通常是 mtime 和文件大小)，签名不一致视为过期；字节数为近似值
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = Lock()
+
+    def lookup(self, key, signature):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            return MISSING
+
+    def put(self, key, signature, size: int, value):
+        with self.lock:
+            self.discard(key)
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (signature, size, value)
+            self.total_bytes += size
+            self.trim()
+
+    def __contains__(self, key) -> bool:
+        return key in self.entries
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def trim(self):
+        while self.entries and (len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            _, (_, size, _) = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+
+    def configure(self, max_entries: int = None, max_bytes: int = None):
+        with self.lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self.trim()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+def file_signature(stat_result) -> tuple:
+    return stat_result.st_mtime_ns, stat_result.st_size
+
+class DocumentCache(LRUCache):
+    # 以内容哈希为键缓存解析后的 content.json，字节完全相同的文件只解析一次、共用同一个对象，字节数按文件大小估算。
+    # paths 记录 路径 -> 内容哈希，以 (mtime, 大小) 校验
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024, max_paths: int = 16384):
+        super().__init__(max_entries, max_bytes)
+        self.paths = LRUCache(max_paths, max_paths)
+        self.shared = 0
+
+    def share(self, digest: str):
+        document = self.lookup(digest, None)
+        if document is not MISSING:
+            with self.lock:
+                self.shared += 1
+        return document
+
+    def entry(self, path: str, stat_result=None, keep: bool = True) -> tuple:
+        # 返回 (内容哈希, 解析结果)。keep 为 False 时新解析的文档不放进缓存，只记录路径对应的哈希
+        if stat_result is None:
+            stat_result = stat(path)
+        signature = file_signature(stat_result)
+        digest = self.paths.lookup(path, signature)
+        if digest is not MISSING:
+            document = self.lookup(digest, None)
+            if document is not MISSING:
+                return digest, document
+        digest, document = load_json_file(path, shared=self.share)
+        self.paths.put(path, signature, 1, digest)
+        if keep and digest not in self:
+            self.put(digest, None, stat_result.st_size, document)
+        return digest, document
+
+    def get(self, path: str, stat_result=None):
+        return self.entry(path, stat_result)[1]
+
+    def known_digest(self, path: str, stat_result=None):
+        # 不读文件，路径没有记录或已变化时返回 None
+        if stat_result is None:
+            stat_result = stat(path)
+        digest = self.paths.lookup(path, file_signature(stat_result))
+        return None if digest is MISSING else digest
+
+    def clear(self):
+        super().clear()
+        self.paths.clear()
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["paths"] = len(self.paths.entries)
+        stats["shared"] = self.shared
+        return stats
+
+document_cache = DocumentCache()
+
+def load_content(dir_path: str, dir_name: str):
+    return document_cache.get(content_json_path(dir_path, dir_name))
+
+def load_contents(dir_path: str, max_workers: int = MAX_LOAD_WORKERS):
+    dir_names = list_content_dirs(dir_path)
+
+    def load(dir_name: str):
+        try:
+            return load_content(dir_path, dir_name), None
+        except (json.JSONDecodeError, FileNotFoundError) as e:
+            return None, f"{dir_name}: {str(e)}"
+
+    if max_workers <= 1 or len(dir_names) <= 1:
+        results = [load(dir_name) for dir_name in dir_names]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(dir_names))) as pool:
+            results = list(pool.map(load, dir_names))
+
+    contents, content_names, errors = [], [], []
+    for dir_name, (content, error) in zip(dir_names, results):
+        if error is None:
+            contents.append(content)
+            content_names.append(dir_name)
+        else:
+            errors.append(error)
+    return contents, content_names, errors
+
+class LatestOnlyWorker:
+    # 单线程后台任务：只执行最近一次提交的任务，还没开始的旧任务直接丢弃；
+    # 任务以 func(generation, *args) 调用，可以随时用 is_current(generation) 检查自己是否已被取代
+    def __init__(self, name: str):
+        self.condition = Condition()
+        self.pending = None
+        self.generation = 0
+        self.thread = Thread(target=self.run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, func, *args) -> int:
+        with self.condition:
+            self.generation += 1
+            self.pending = (self.generation, func, args)
+            self.condition.notify()
+            return self.generation
+
+    def cancel(self):
+        with self.condition:
+            self.generation += 1
+            self.pending = None
+
+    def is_current(self, generation: int) -> bool:
+        return generation == self.generation
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                generation, func, args = self.pending
+                self.pending = None
+            try:
+                func(generation, *args)
+            except Exception:
+                print_exc()
@@ -1,12 +1,24 @@
 import wx
-import re
 import json
-from os import walk
+from traceback import print_exc
 from ctypes import windll
-from datetime import datetime
-from os.path import getmtime, join as path_join, expandvars, isdir
+from threading import Thread, Event
+from multiprocessing import freeze_support
+from os import stat
+from os.path import basename, dirname, expandvars, isdir, join as path_join
+from loader import LatestOnlyWorker, content_json_path, list_content_dirs, json_decoder_name, file_signature
+from scanner import EtsRoot, root_of, find_ets_roots
+from core import FIRST_CHUNK_SIZE, Prefetcher, export_contents, cache_stats, iter_text_chunks
+from batch import batch_export
+from watcher import DirectoryWatcher
+from timing import timer
+from exam_index import ExamIndex
+from search import SearchIndex
+from list_model import ExamListModel
 
 font_cache = {}
+FONT_DELAY_MS = 150
+BATCH_PROGRESS_RANGE = 1000
 
 def ft(size: int) -> wx.Font:
     if size not in font_cache:
@@ -31,273 +43,177 @@ class CenteredStaticText(wx.StaticText):
         dc.DrawText(label, (size[0] - Tsize[0]) // 2, (size[1] - Tsize[1]) // 2)
 
 class TSListView(wx.ListCtrl):
-    def __init__(self, parent: wx.Window):
-        super().__init__(parent, size=(250, MAX_SIZE[1]), style=wx.LC_REPORT | wx.LC_SINGLE_SEL | wx.LC_SORT_ASCENDING)
+    def __init__(self, parent: wx.Window, exam_index: ExamIndex, search_index: SearchIndex):
+        super().__init__(parent, size=(250, MAX_SIZE[1]), style=wx.LC_REPORT | wx.LC_VIRTUAL | wx.LC_SINGLE_SEL)
         self.InsertColumn(0, "文件名", width=60)
         self.InsertColumn(1, "更改时间", width=140)
-        self.root_dir = ""
+        self.roots = []
+        self.root_records = {}
+        self.model = ExamListModel()
+        self.exam_index = exam_index
+        self.search_index = search_index
+        self.refresh_generation = 0
+        self.refreshers = {}
+        self.suppress_selection = False
         self.Bind(wx.EVT_LIST_ITEM_SELECTED, self.on_item_selected)
-
-    def load_dir(self, dir_path: str):
-        self.root_dir = dir_path
-        walk_obj = walk(dir_path)
-        _, dir_names, _ = next(walk_obj)
-        self.DeleteAllItems()
-        full_number_pattern = re.compile(r".*\d+")
-        for dir_name in dir_names:
-            if not re.match(full_number_pattern, dir_name):
+        self.Bind(wx.EVT_LIST_COL_CLICK, self.on_col_click)
+
+    def OnGetItemText(self, item: int, col: int) -> str:
+        if col == 0:
+            return self.model.name(item)
+        if col == 1:
+            return self.model.mtime_text(item)
+        return self.model.root(item).label
+
+    def load_roots(self, roots: list, recheck=()):
+        # 先用索引里的记录立即填充列表，再在后台并行与各个根目录对账。recheck 见 SearchIndex.update
+        self.roots = roots
+        self.root_records = {root.path: self.exam_index.load(root.path) for root in roots}
+        if len(roots) > 1 and self.GetColumnCount() == 2:
+            self.InsertColumn(2, "账号", width=80)
+        elif len(roots) <= 1 and self.GetColumnCount() == 3:
+            self.DeleteColumn(2)
+        self.populate()
+        self.search_index.set_parents([root.path for root in roots])
+        self.refresh_generation += 1
+        self.refresh_roots(roots, recheck)
+
+    def refresh_root(self, root: EtsRoot, generation: int):
+        # 扫描完先按名称和更改时间更新列表，变化的作业文件夹读取完后再更新一次
+        def scanned(*result):
+            wx.CallAfter(self.on_refreshed, generation, [root], [result])
+
+        try:
+            # 在实际扫描和读取的线程里计时，cProfile 才能分析到这些工作
+            with timer.operation("load_dir"):
+                return self.exam_index.refresh(root.path, scanned)
+        except (FileNotFoundError, NotADirectoryError):
+            return [], [], []
+
+    def refresh_roots(self, roots: list, recheck=()):
+        # 每个根目录一个后台线程，同一根目录的刷新依次执行，结果按顺序回到界面线程，旧结果不会覆盖新结果；
+        # 还没开始的刷新被新的取代。监视到变化时也用当前的 refresh_generation，不会作废正在进行的完整刷新
+        for root in roots:
+            if root.path not in self.refreshers:
+                self.refreshers[root.path] = LatestOnlyWorker(f"refresh-{root.label}")
+            self.refreshers[root.path].submit(self.refresh_worker, root, self.refresh_generation, recheck)
+
+    def refresh_worker(self, _, root: EtsRoot, generation: int, recheck):
+        try:
+            result = self.refresh_root(root, generation)
+        except Exception as e:
+            print_exc()
+            wx.CallAfter(self.on_refresh_failed, generation, str(e))
+            return
+        wx.CallAfter(self.on_refreshed, generation, [root], [result])
+        try:
+            self.search_index.update(root.path, *result, recheck)
+        except Exception:
+            print_exc()
+
+    def recheck_exam(self, exam_dir: str):
+        # content.json 被原地改写时作业文件夹的 mtime 不变，根目录的刷新发现不了，只对这个作业重新检查搜索索引
+        parent, name = dirname(exam_dir), basename(exam_dir)
+        record = next((record for record in self.root_records.get(parent, ()) if record.name == name), None)
+        if record is not None:
+            Thread(target=self.search_index.update_exam, args=(parent, record), daemon=True).start()
+
+    def on_refresh_failed(self, generation: int, error: str):
+        if generation == self.refresh_generation:
+            wx.MessageBox(f"刷新文件夹失败：\n{error}", "错误", wx.OK | wx.ICON_ERROR, parent=self)
+
+    def on_refreshed(self, generation: int, roots: list, results: list):
+        if generation != self.refresh_generation:
+            return
+        modified = False
+        changed_paths = []
+        for root, (records, changed, removed) in zip(roots, results):
+            if root.path not in self.root_records:
                 continue
-            self.InsertItem(self.GetItemCount(), dir_name)
-            mtime = getmtime(path_join(dir_path, dir_name))
-            mtime_string = datetime.fromtimestamp(int(mtime))
-            self.SetItem(self.GetItemCount() - 1, 1, str(mtime_string))
-            self.SetItemData(self.GetItemCount() - 1, int(mtime * 100))
-        self.SortItems(self.SortItemCbkFunc)
-
-    def SortItemCbkFunc(self, item1, item2):
-        return item2 - item1
+            modified = modified or changed or removed or len(self.root_records[root.path]) != len(records)
+            self.root_records[root.path] = records
+            changed_paths += [path_join(root.path, name) for name in changed]
+        if modified:
+            self.populate(changed_paths)
+
+    def populate(self, changed_paths: list = None):
+        self.update_model(self.model.set_records, [(root, self.root_records[root.path]) for root in self.roots], changed_paths=changed_paths)
+
+    def set_filter(self, filter_text: str):
+        self.update_model(self.model.set_filter, filter_text)
+
+    def set_sort_order(self, sort_order: str):
+        self.update_model(self.model.set_sort_order, sort_order)
+
+    def update_model(self, update, *args, changed_paths: list = None):
+        # 虚拟列表的选中状态是按行号记录的，模型变化后按名称重新选中。
+        # 给出 changed_paths 且各行的排列没有变化时，只重绘这几行
+        view_paths = self.model.view_paths() if changed_paths is not None else None
+        selected_path = self.selected_path()
+        selected_row = self.GetFirstSelected()
+        update(*args)
+        if view_paths is not None and view_paths == self.model.view_paths():
+            for path in changed_paths:
+                row = self.model.row_of(path)
+                if row != -1:
+                    self.RefreshItem(row)
+            return
+        if selected_path is not None:
+            self.suppress_selection = True
+            self.Select(selected_row, False)
+            self.suppress_selection = False
+        self.SetItemCount(len(self.model))
+        self.Refresh()
+        if selected_path is not None:
+            self.select_path(selected_path)
+
+    def on_col_click(self, event: wx.ListEvent):
+        if event.GetColumn() == 0:
+            sort_order = "name_desc" if self.model.sort_order == "name_asc" else "name_asc"
+        else:
+            sort_order = "mtime_asc" if self.model.sort_order == "mtime_desc" else "mtime_desc"
+        self.set_sort_order(sort_order)
+
+    def select_path(self, dir_path: str) -> bool:
+        # 只改变选中行，不触发重新加载作业
+        index = self.model.row_of(dir_path)
+        if index == -1:
+            return False
+        self.suppress_selection = True
+        self.Select(index)
+        self.EnsureVisible(index)
+        self.suppress_selection = False
+        return True
+
+    def neighbour_paths(self) -> list:
+        index = self.GetFirstSelected()
+        if index == wx.NOT_FOUND:
+            return []
+        return [self.model.path(i) for i in (index + 1, index - 1) if 0 <= i < len(self.model)]
+
+    def selected_path(self):
+        index = self.GetFirstSelected()
+        return self.model.path(index) if index != wx.NOT_FOUND and index < len(self.model) else None
 
     def on_item_selected(self, event: wx.ListEvent):
-        item: wx.ListItem = event.GetItem()
-        viewer.ts_dir_change(item.GetText())
-
-import re
-import html
-
-def clean_html_tags(content: str) -> str:
-    if not content:
-        return ""
-    content = re.sub(r"<!--.*?-->", "", content, flags=re.DOTALL)
-    content = re.sub(r"<[^>]*>", "", content)
-    content = html.unescape(content)
-    content = re.sub(r"\n\s*\n", "\n", content).strip()
-    return content
-
-def format_question_json(json_data, show_full_answers=True):
-    structure_type = json_data.get("structure_type")
-    if structure_type == "collector.role":
-        return format_role_type(json_data, show_full_answers)
-    elif structure_type == "collector.picture":
-        return format_picture_type(json_data, show_full_answers)
-    elif structure_type == "collector.read":
-        return format_read_type(json_data)
-    elif structure_type == "collector.repeat_essay":
-        return format_repeat_essay(json_data)
-    elif structure_type == "collector.repeat_dialogue":
-        return format_repeat_dialogue(json_data)
-    elif structure_type == "collector.word":
-        return format_word_type(json_data)
-    elif structure_type == "collector.choose":
-        return format_choose_type(json_data, show_full_answers)
-    return json.dumps(json_data, indent=4, ensure_ascii=False)
-
-def format_role_type(json_data, show_full_answers):
-    result = []
-    info = json_data.get("info", {})
-    questions = info.get("question", [])
-    if "value" in info and info["value"]:
-        cleaned_dialog = clean_html_tags(info["value"])
-        result.append("==对话内容==")
-        result.append(cleaned_dialog)
-        result.append("")
-    for idx, question in enumerate(questions, 1):
-        raw_ask = question.get("ask", "")
-        cleaned_ask = clean_html_tags(raw_ask)
-        cleaned_ask = re.sub(r"ets_th\d+\s*", "", cleaned_ask)
-        ask_text = cleaned_ask.strip()
-        result.append(f"题目 {idx}：{ask_text}")
-        if "keywords" in question and question["keywords"]:
-            result.append(f"关键词：{question['keywords']}")
-        std_options = question.get("std", [])
-        if std_options:
-            result.append("答案选项：")
-            display_options = std_options if show_full_answers else std_options[:3]
-            for i, opt in enumerate(display_options, 1):
-                raw_value = opt.get('value', '')
-                cleaned_value = clean_html_tags(raw_value)
-                result.append(f"{i}. {cleaned_value.strip()}")
-            if not show_full_answers and len(std_options) > 3:
-                result.append(f"... 还有{len(std_options)-3}个答案未显示（可勾选显示完整答案）")
-            result.append("")
-    return "\n".join(result)
-
-def format_picture_type(json_data, show_full_answers):
-    result = []
-    info = json_data.get("info", {})
-    if "topic" in info and info["topic"]:
-        result.append(f"==主题：{info['topic']}==")
-        result.append("")
-    if "image" in info and info["image"]:
-        result.append(f"图片：{info['image']}")
-        result.append("")
-    if "value" in info and info["value"]:
-        cleaned_text = clean_html_tags(info["value"])
-        result.append("==内容描述==")
-        result.append(cleaned_text.replace("</br>", "\n").strip())
-        result.append("")
-    if "keypoint" in info and info["keypoint"]:
-        cleaned_keypoints = clean_html_tags(info["keypoint"])
-        result.append("==核心要点==")
-        points = re.split(r"(?=\d+\. )", cleaned_keypoints)
-        for point in [p.strip() for p in points if p.strip()]:
-            result.append(point)
-        result.append("")
-    std_options = info.get("std", [])
-    if std_options:
-        result.append("==参考答案==")
-        display_options = std_options if show_full_answers else std_options[:3]
-        for i, opt in enumerate(display_options, 1):
-            cleaned_answer = clean_html_tags(opt.get("value", ""))
-            cleaned_answer = re.sub(r"\n\s*\n", "\n", cleaned_answer).strip()
-            result.append(f"答案 {i}：")
-            result.append(cleaned_answer)
-            result.append("")
-        if not show_full_answers and len(std_options) > 3:
-            result.append(f"... 还有{len(std_options)-3}个答案未显示（可勾选显示完整答案）")
-            result.append("")
-    return "\n".join(result)
-
-def format_choose_type(json_data, show_full_answers=True):
-    result = []
-    info = json_data.get("info", {})
-    result.append("==选择题==")
-    result.append("")
-    st_nr = clean_html_tags(info.get("st_nr", ""))
-    if st_nr:
-        result.append("题目描述：")
-        result.append(st_nr)
-        result.append("")
-    xtlist = info.get("xtlist", [])
-    is_single_question = len(xtlist) == 1
-    answer_summary = []
-    for idx, xt_item in enumerate(xtlist, 1):
-        answer = xt_item.get("answer", "")
-        if answer:
-            if is_single_question:
-                answer_summary.append(f"正确答案：{answer}")
-            else:
-                answer_summary.append(f"第 {idx} 题：{answer}")
-    if answer_summary:
-        if not is_single_question:
-            result.append("正确答案汇总：")
-        result.extend(answer_summary)
-        result.append("")
-    for idx, xt_item in enumerate(xtlist, 1):
-        xt_nr = clean_html_tags(xt_item.get("xt_nr", ""))
-        if xt_nr:
-            if is_single_question:
-                result.append(f"{xt_nr}")
-            else:
-                result.append(f"第 {idx} 题：{xt_nr}")
-            result.append("")
-        xxlist = xt_item.get("xxlist", [])
-        if xxlist:
-            result.append("选项：")
-            for option in xxlist:
-                xx_mc = option.get("xx_mc", "")
-                xx_nr = clean_html_tags(option.get("xx_nr", ""))
-                if xx_mc and xx_nr:
-                    result.append(f"  {xx_mc}. {xx_nr}")
-            result.append("")
-    return "\n".join(result)
-
-def format_read_type(json_data):
-    result = []
-    info = json_data.get("info", {})
-    result.append("==阅读材料==")
-    result.append("")
-    if "value" in info and info["value"]:
-        cleaned_text = clean_html_tags(info["value"])
-        formatted_text = cleaned_text.replace("</br>", "\n").strip()
-        result.append(formatted_text)
-        result.append("")
-    return "\n".join(result)
-
-def format_repeat_essay(json_data):
-    result = []
-    info = json_data.get("info", {})
-    result.append("==问答短文==")
-    result.append("")
-    if "value" in info and info["value"]:
-        cleaned_text = clean_html_tags(info["value"])
-        result.append(cleaned_text.replace("</br>", "\n").strip())
-        result.append("")
-    sublist = info.get("sublist", [])
-    if sublist:
-        result.append("==参考翻译==")
-        for item in sublist:
-            if "text" in item and "translate" in item:
-                result.append(f"{clean_html_tags(item['text'])}")
-                result.append(f"  → {clean_html_tags(item['translate'])}")
-                result.append("")
-    return "\n".join(result)
-
-def format_repeat_dialogue(json_data):
-    result = []
-    info = json_data.get("info", {})
-    result.append("==对话内容==")
-    result.append("")
-    if "value" in info and info["value"]:
-        cleaned_text = clean_html_tags(info["value"])
-        result.append(cleaned_text.replace("</br>", "\n").strip())
-        result.append("")
-    sublist = info.get("sublist", [])
-    if sublist:
-        result.append("==详细对话==")
-        for item in sublist:
-            if "role" in item and "text" in item:
-                result.append(f"{item['role']}: {clean_html_tags(item['text'])}")
-                if "translate" in item:
-                    result.append(f"  → {clean_html_tags(item['translate'])}")
-                result.append("")
-    return "\n".join(result)
-
-def format_word_type(json_data):
-    result = []
-    info = json_data.get("info", {})
-    result.append("==词汇问答==")
-    result.append("")
-    value_content = clean_html_tags(info.get("value", ""))
-    translate_content = clean_html_tags(info.get("translate", ""))
-    if value_content and translate_content and not re.search(r"[?]", value_content):
-        result.append("原文内容：")
-        result.append(value_content)
-        result.append("")
-        result.append("参考翻译：")
-        result.append(translate_content)
-        result.append("")
-    else:
-        if value_content:
-            result.append("原文内容：")
-            items = re.split(r"(?=What|Who|How|Why|Where|When|Which)", value_content)
-            for item in [i.strip() for i in items if i.strip()]:
-                result.append(item)
-            result.append("")
-        if translate_content:
-            result.append("参考翻译：")
-            trans_items = re.split(r"(?=(What|Who|How|Why|Where|When|Which|A strong wind) )", translate_content)
-            for i in range(0, len(trans_items), 2):
-                if i+1 < len(trans_items):
-                    question_part = trans_items[i+1].strip()
-                    answer_part = trans_items[i].strip()
-                    if question_part:
-                        combined = f"{question_part}{answer_part}"
-                        processed_text = re.sub(r"([。！？])", r"\1\n", combined)
-                        result.append(processed_text.strip())
-                        result.append("")
-    return "\n".join(result)
-
+        if self.suppress_selection:
+            return
+        viewer.ts_dir_change(self.model.path(event.GetIndex()))
 
 class ContentJsonViewer(wx.Panel):
     def __init__(self, parent: wx.Window):
         super().__init__(parent)
         self.activate_exam_dir = ""
-        self.contents = []
         self.content_names = []
         self.content_index = 0
         self.ctrl_down = False
         self.pretty_print_enabled = True
         self.show_full_answers = False
+        self.export_cancel = None
+        self.export_progress = None
+        self.shown_signature = None
+        self.exam_loader = LatestOnlyWorker("exam-loader")
+        self.prefetcher = Prefetcher()
         self.sizer = wx.BoxSizer(wx.VERTICAL)
         self.option_sizer = wx.BoxSizer(wx.HORIZONTAL)
         self.pretty_print_checkbox = wx.CheckBox(self, label="启用美观输出")
@@ -328,6 +244,9 @@ class ContentJsonViewer(wx.Panel):
 
         self.SetSizer(self.sizer)
         self.font_size = self.json_viewer.GetFont().GetPointSize()
+        self.font_timer = None
+        self.fill_chunks = None
+        self.displayed_text = ""
 
         self.back_btn.Bind(wx.EVT_BUTTON, self.prev_content)
         self.forward_btn.Bind(wx.EVT_BUTTON, self.next_content)
@@ -335,16 +254,17 @@ class ContentJsonViewer(wx.Panel):
         self.json_viewer.Bind(wx.EVT_KEY_DOWN, lambda e:self.on_key_down(e, True))
         self.json_viewer.Bind(wx.EVT_KEY_UP, lambda e:self.on_key_down(e, False))
         self.json_viewer.Bind(wx.EVT_MOUSEWHEEL, self.on_scroll)
+        self.Bind(wx.EVT_IDLE, self.on_idle)
 
     def on_pretty_print_toggle(self, event: wx.CommandEvent):
         self.pretty_print_enabled = event.IsChecked()
         self.full_answers_checkbox.Enable(event.IsChecked())
-        if self.contents:
+        if self.content_names:
             self.content_change()
 
     def on_full_answers_toggle(self, event: wx.CommandEvent):
         self.show_full_answers = event.IsChecked()
-        if self.contents and self.pretty_print_enabled:
+        if self.content_names and self.pretty_print_enabled:
             self.content_change()
 
     def on_key_down(self, event: wx.KeyEvent, down_up: bool):
@@ -366,9 +286,46 @@ class ContentJsonViewer(wx.Panel):
                 self.font_size += 1
             else:
                 self.font_size -= 1
-            self.json_viewer.SetFont(ft(self.font_size))
+            # 连续滚动时只在停下来后换一次字体，大文本每次换字体都要重新排版
+            if self.font_timer is not None and self.font_timer.IsRunning():
+                self.font_timer.Start(FONT_DELAY_MS)
+            else:
+                self.font_timer = wx.CallLater(FONT_DELAY_MS, self.apply_font)
         event.Skip()
 
+    def apply_font(self):
+        if self.json_viewer.GetFont().GetPointSize() == self.font_size:
+            return
+        # 换字体会把控件里的全部文本重新排版，所以只保留到光标或屏幕底部再多一块，
+        # 后面的部分重新放回空闲时逐块追加的队列
+        position = self.json_viewer.GetInsertionPoint()
+        _, top = self.json_viewer.HitTestPos((0, 0))
+        _, bottom = self.json_viewer.HitTestPos((0, self.json_viewer.GetClientSize().height - 1))
+        chunks = iter_text_chunks(self.displayed_text, max(position, bottom) + FIRST_CHUNK_SIZE)
+        self.json_viewer.Freeze()
+        self.json_viewer.SetValue(next(chunks, ""))
+        self.json_viewer.SetFont(ft(self.font_size))
+        self.json_viewer.SetInsertionPoint(position)
+        self.json_viewer.ShowPosition(top)
+        self.json_viewer.Thaw()
+        self.fill_chunks = chunks
+
+    def on_idle(self, event: wx.IdleEvent):
+        # 大文本先显示第一块，剩下的在空闲时逐块追加，不会一次卡住界面
+        if self.fill_chunks is None:
+            return
+        chunk = next(self.fill_chunks, None)
+        if chunk is None:
+            self.fill_chunks = None
+            return
+        position = self.json_viewer.GetInsertionPoint()
+        with timer.stage("AppendText"):
+            self.json_viewer.Freeze()
+            self.json_viewer.AppendText(chunk)
+            self.json_viewer.SetInsertionPoint(position)
+            self.json_viewer.Thaw()
+        event.RequestMore()
+
     def popup_choose_menu(self, _):
         if self.activate_exam_dir == "":
             return
@@ -400,43 +357,132 @@ class ContentJsonViewer(wx.Panel):
             wx.MessageBox("已经是第一个了", "提示", wx.OK | wx.ICON_INFORMATION)
 
     def check_index(self) -> bool:
-        return 0 <= self.content_index < len(self.contents)
+        return 0 <= self.content_index < len(self.content_names)
 
     def content_change(self):
-        self.content_dir_text.SetLabel(f"当前目录：{self.content_names[self.content_index]}")
+        content_name = self.content_names[self.content_index]
+        self.prefetcher.pause()
+        with timer.operation("content_change"):
+            try:
+                formatted_content = self.prefetcher.render(
+                    content_json_path(self.activate_exam_dir, content_name),
+                    self.pretty_print_enabled,
+                    self.show_full_answers
+                )
+            except Exception as e:
+                # 编码错误、不是对象的 JSON 等也按解析错误提示，不让事件处理函数抛出异常
+                formatted_content, error = "", f"{content_name}: {str(e)}"
+            else:
+                error = None
+            self.show_content(content_name, formatted_content, error)
+        self.shown_signature = self.current_signature()
+        self.schedule_prefetch()
+
+    def current_signature(self):
+        try:
+            return file_signature(stat(content_json_path(self.activate_exam_dir, self.content_names[self.content_index])))
+        except (OSError, IndexError):
+            return None
+
+    def reload_changed(self):
+        # 打开的作业文件夹有变化：条目增删只更新条目列表并保持当前条目，当前条目的文件变了才重新显示
+        if not self.activate_exam_dir:
+            return
+        current_name = self.content_names[self.content_index] if self.check_index() else None
+        try:
+            content_names = list_content_dirs(self.activate_exam_dir)
+        except OSError:
+            content_names = []
+        self.content_names = content_names
+        if current_name in content_names:
+            self.content_index = content_names.index(current_name)
+        else:
+            self.content_index = max(min(self.content_index, len(content_names) - 1), 0)
+        if not content_names:
+            self.shown_signature = None
+            self.show_content("", "")
+        elif content_names[self.content_index] != current_name or self.current_signature() != self.shown_signature:
+            self.content_change()
+        else:
+            self.schedule_prefetch()
+
+    def schedule_prefetch(self):
+        # 优先级：当前作业的 ±1、±2 条目，然后是列表中上下相邻的作业
+        tasks = []
+        for offset in (1, -1, 2, -2):
+            index = self.content_index + offset
+            if 0 <= index < len(self.content_names):
+                tasks.append((self.activate_exam_dir, self.content_names[index]))
+        for dir_path in self.GetParent().ts_list.neighbour_paths():
+            if dir_path != self.activate_exam_dir:
+                tasks.append((dir_path, None))
+        self.prefetcher.schedule(tasks, self.pretty_print_enabled, self.show_full_answers)
+
+    def show_content(self, content_name: str, formatted_content: str, error: str = None):
+        self.content_dir_text.SetLabel(f"当前目录：{content_name}")
         self.top_sizer.Layout()
-        if self.pretty_print_enabled:
-            formatted_content = format_question_json(
-                self.contents[self.content_index],
-                show_full_answers=self.show_full_answers
+        self.displayed_text = formatted_content
+        chunks = iter_text_chunks(formatted_content)
+        with timer.stage("SetValue"):
+            self.json_viewer.SetValue(next(chunks, ""))
+        self.fill_chunks = chunks
+        if error is not None:
+            wx.MessageBox(f"解析错误：\n{error}", "错误", wx.OK | wx.ICON_ERROR, parent=self)
+
+    def init_data(self, dir_path: str, content_name: str = None):
+        # 在后台线程读取和渲染，快速切换作业时只有最后选中的那个会显示出来
+        self.content_dir_text.SetLabel("当前目录：加载中...")
+        self.top_sizer.Layout()
+        self.prefetcher.pause()
+        self.exam_loader.submit(
+            self.load_exam_worker, dir_path, content_name, self.pretty_print_enabled, self.show_full_answers
+        )
+
+    def load_exam_worker(self, generation: int, dir_path: str, content_name: str, pretty_print_enabled: bool, show_full_answers: bool):
+        with timer.operation("init_data"):
+            try:
+                content_names = list_content_dirs(dir_path)
+            except OSError:
+                content_names = []
+            content_index = content_names.index(content_name) if content_name in content_names else 0
+            formatted_content, error = "", None
+            if content_names and self.exam_loader.is_current(generation):
+                try:
+                    formatted_content = self.prefetcher.render(
+                        content_json_path(dir_path, content_names[content_index]),
+                        pretty_print_enabled,
+                        show_full_answers
+                    )
+                except Exception as e:
+                    # 出错时也要回到界面线程，否则会一直显示“加载中”
+                    error = f"{content_names[content_index]}: {str(e)}"
+        if self.exam_loader.is_current(generation):
+            wx.CallAfter(
+                self.on_exam_loaded, generation, dir_path, content_names, content_index,
+                pretty_print_enabled, show_full_answers, formatted_content, error
             )
-        else:
-            formatted_content = json.dumps(self.contents[self.content_index], indent=4, ensure_ascii=False)
-        self.json_viewer.SetValue(formatted_content)
 
-    def init_data(self, dir_path: str):
-        self.content_names.clear()
-        self.contents.clear()
+    def on_exam_loaded(self, generation: int, dir_path: str, content_names: list, content_index: int,
+                       pretty_print_enabled: bool, show_full_answers: bool, formatted_content: str, error: str):
+        if not self.exam_loader.is_current(generation):
+            return
         self.activate_exam_dir = dir_path
-        walk_obj = walk(dir_path)
-        _, dir_names, _ = next(walk_obj)
-        errors = []
-        for dir_name in dir_names:
-            if dir_name.startswith("content"):
-                try:
-                    with open(path_join(dir_path, dir_name, "content.json"), "r", encoding="utf-8") as f:
-                        content_text = f.read()
-                    self.contents.append(json.loads(content_text))
-                    self.content_names.append(dir_name)
-                except (json.JSONDecodeError, FileNotFoundError) as e:
-                    errors.append(f"{dir_name}: {str(e)}")
-        if errors:
-            wx.MessageBox(f"解析错误：\n" + "\n".join(errors), "错误", wx.OK | wx.ICON_ERROR, parent=self)
-        self.content_index = 0
-        self.content_change()
+        self.content_names = content_names
+        self.content_index = content_index
+        self.shown_signature = None
+        self.GetParent().update_watch()
+        if not content_names:
+            self.show_content("", "")
+        elif (pretty_print_enabled, show_full_answers) != (self.pretty_print_enabled, self.show_full_answers):
+            # 加载期间切换了显示模式
+            self.content_change()
+        else:
+            self.show_content(content_names[content_index], formatted_content, error)
+            self.shown_signature = self.current_signature()
+            self.schedule_prefetch()
 
     def export_to_txt(self, event: wx.CommandEvent):
-        if not self.contents or not self.activate_exam_dir:
+        if not self.content_names or not self.activate_exam_dir:
             wx.MessageBox("没有可导出的数据或目录未加载。", "提示", wx.OK | wx.ICON_INFORMATION)
             return
         dir_path_parts = self.activate_exam_dir.replace('\\', '/').split('/')
@@ -452,22 +498,110 @@ class ContentJsonViewer(wx.Panel):
             if fileDialog.ShowModal() == wx.ID_CANCEL:
                 return
             pathname = fileDialog.GetPath()
-            try:
-                with open(pathname, 'w', encoding='utf-8') as file:
-                    for i, (content_name, content_data) in enumerate(zip(self.content_names, self.contents)):
-                        file.write(f"--- 条目 {i+1}: {content_name} ---\n")
-                        if self.pretty_print_enabled:
-                            formatted_content = format_question_json(
-                                content_data,
-                                show_full_answers=self.show_full_answers
-                            )
-                        else:
-                            formatted_content = json.dumps(content_data, indent=4, ensure_ascii=False)
-                        file.write(formatted_content)
-                        file.write("\n\n")
-                wx.MessageBox(f"导出成功！文件保存至：\n{pathname}", "成功", wx.OK | wx.ICON_INFORMATION)
-            except IOError:
-                wx.MessageBox(f"无法保存文件：{pathname}", "错误", wx.OK | wx.ICON_ERROR)
+        self.export_btn.Disable()
+        self.export_cancel = Event()
+        self.export_progress = wx.ProgressDialog(
+            "导出", "正在导出...", maximum=len(self.content_names), parent=self,
+            style=wx.PD_APP_MODAL | wx.PD_CAN_ABORT | wx.PD_AUTO_HIDE | wx.PD_ELAPSED_TIME
+        )
+        Thread(
+            target=self.export_worker,
+            args=(pathname, self.activate_exam_dir, list(self.content_names), self.pretty_print_enabled, self.show_full_answers),
+            daemon=True
+        ).start()
+
+    def export_worker(self, pathname: str, dir_path: str, content_names: list, pretty_print_enabled: bool, show_full_answers: bool):
+        try:
+            with timer.operation("export"):
+                finished = export_contents(
+                    pathname, dir_path, content_names, pretty_print_enabled, show_full_answers,
+                    progress=lambda done, total: wx.CallAfter(self.on_export_progress, done),
+                    cancel_event=self.export_cancel
+                )
+        except IOError:
+            wx.CallAfter(self.on_export_done, pathname, None)
+        except Exception as e:
+            print_exc()
+            wx.CallAfter(self.on_export_done, pathname, None, f"{type(e).__name__}: {e}")
+        else:
+            wx.CallAfter(self.on_export_done, pathname, finished)
+
+    def on_export_progress(self, done: int):
+        if self.export_progress is None:
+            return
+        keep_going, _ = self.export_progress.Update(done)
+        if not keep_going:
+            self.export_cancel.set()
+
+    def on_export_done(self, pathname: str, finished, error: str = ""):
+        self.export_progress.Destroy()
+        self.export_progress = None
+        self.export_btn.Enable()
+        if error:
+            wx.MessageBox(f"导出失败：\n{error}", "错误", wx.OK | wx.ICON_ERROR)
+        elif finished is None:
+            wx.MessageBox(f"无法保存文件：{pathname}", "错误", wx.OK | wx.ICON_ERROR)
+        elif finished:
+            wx.MessageBox(f"导出成功！文件保存至：\n{pathname}", "成功", wx.OK | wx.ICON_INFORMATION)
+        else:
+            wx.MessageBox("导出已取消", "提示", wx.OK | wx.ICON_INFORMATION)
+
+CACHE_LABELS = {"document": "解析", "record": "精简记录", "ir": "中间表示", "render": "渲染"}
+
+class StatsDialog(wx.Dialog):
+    def __init__(self, parent: wx.Window, snapshot):
+        super().__init__(parent, title="性能统计", size=(760, 560), style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER)
+        self.snapshot = snapshot
+        self.sizer = wx.BoxSizer(wx.VERTICAL)
+        self.stats_text = wx.TextCtrl(self, style=wx.TE_MULTILINE | wx.TE_READONLY | wx.HSCROLL)
+        self.stats_text.SetFont(wx.Font(9, wx.FONTFAMILY_TELETYPE, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL))
+        self.sizer.Add(self.stats_text, proportion=1, flag=wx.EXPAND | wx.ALL, border=5)
+        self.button_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        for label, handler in (("刷新", self.refresh), ("清空", self.clear), ("保存为JSON", self.save)):
+            button = wx.Button(self, label=label)
+            button.Bind(wx.EVT_BUTTON, handler)
+            self.button_sizer.Add(button, proportion=0, flag=wx.LEFT | wx.RIGHT, border=5)
+        self.button_sizer.Add(wx.Button(self, wx.ID_CANCEL, label="关闭"), proportion=0, flag=wx.LEFT | wx.RIGHT, border=5)
+        self.sizer.Add(self.button_sizer, proportion=0, flag=wx.ALIGN_RIGHT | wx.ALL, border=5)
+        self.SetSizer(self.sizer)
+        self.refresh()
+
+    def refresh(self, *_):
+        snapshot = self.snapshot()
+        lines = [timer.report(), "", f"JSON 解码器：{snapshot['json_decoder']}", ""]
+        for name, stats in snapshot["caches"].items():
+            lookups = stats["hits"] + stats["misses"]
+            hit_rate = stats["hits"] / lookups if lookups else 0
+            lines.append(
+                f"{CACHE_LABELS.get(name, name)}缓存：{stats['entries']}/{stats['max_entries']} 项，{stats['bytes'] / 2 ** 20:.1f}/{stats['max_bytes'] / 2 ** 20:.0f} MiB，"
+                f"命中率 {hit_rate:.0%}，淘汰 {stats['evictions']} 次"
+                + (f"，相同内容共用 {stats['shared']} 次" if "shared" in stats else "")
+            )
+        prefetcher = snapshot["prefetcher"]
+        lines.append(f"预取：已渲染 {prefetcher['rendered']} 个，命中率 {prefetcher['hit_rate']:.0%}，超出预算 {prefetcher['over_budget']} 次")
+        if timer.profile_result is not None:
+            lines += ["", f"cProfile：{timer.profile_result['operation']} ({timer.profile_result['time']})", timer.profile_result["text"]]
+        self.stats_text.SetValue("\n".join(lines))
+
+    def clear(self, *_):
+        timer.clear()
+        self.refresh()
+
+    def save(self, *_):
+        with wx.FileDialog(
+            self, message="保存性能统计", defaultFile="etsviewer_stats.json",
+            wildcard="JSON files (*.json)|*.json", style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT
+        ) as file_dlg:
+            if file_dlg.ShowModal() == wx.ID_CANCEL:
+                return
+            pathname = file_dlg.GetPath()
+        try:
+            timer.dump(pathname, self.snapshot())
+        except IOError:
+            wx.MessageBox(f"无法保存文件：{pathname}", "错误", wx.OK | wx.ICON_ERROR, parent=self)
+        except Exception as e:
+            print_exc()
+            wx.MessageBox(f"保存失败：\n{type(e).__name__}: {e}", "错误", wx.OK | wx.ICON_ERROR, parent=self)
 
 GetSystemMetrics = windll.user32.GetSystemMetrics
 MAX_SIZE = (GetSystemMetrics(0), GetSystemMetrics(1))
@@ -475,11 +609,22 @@ MAX_SIZE = (GetSystemMetrics(0), GetSystemMetrics(1))
 class Viewer(wx.Frame):
     def __init__(self, parent: wx.Frame):
         super().__init__(parent, title="ETSViewer", size=(820, 780))
-        self.ts_parent_dir = ""
+        self.ts_roots = []
+        self.batch_cancel = None
+        self.batch_progress = None
+        self.watcher = DirectoryWatcher(lambda paths: wx.CallAfter(self.on_watched_change, paths))
+        self.exam_index = ExamIndex()
+        self.search_index = SearchIndex(self.exam_index)
         self.sizer = wx.BoxSizer(wx.HORIZONTAL)
-        self.ts_list = TSListView(self)
+        self.list_sizer = wx.BoxSizer(wx.VERTICAL)
+        self.filter_ctrl = wx.SearchCtrl(self, size=(250, -1))
+        self.filter_ctrl.SetDescriptiveText("筛选文件名")
+        self.filter_ctrl.Bind(wx.EVT_TEXT, lambda e: self.ts_list.set_filter(e.GetString()))
+        self.ts_list = TSListView(self, self.exam_index, self.search_index)
+        self.list_sizer.Add(self.filter_ctrl, proportion=0, flag=wx.EXPAND)
+        self.list_sizer.Add(self.ts_list, proportion=1)
         self.content_json_viewer = ContentJsonViewer(self)
-        self.sizer.Add(self.ts_list, proportion=0)
+        self.sizer.Add(self.list_sizer, proportion=0, flag=wx.EXPAND)
         self.sizer.Add(self.content_json_viewer, flag=wx.EXPAND, proportion=1)
         self.SetSizer(self.sizer)
 
@@ -488,46 +633,194 @@ class Viewer(wx.Frame):
         self.open_menu.Append(0, "打开文件夹")
         self.open_menu.Append(1, "自动选择文件夹")
         self.open_menu.Append(2, "刷新文件夹")
+        self.open_menu.Append(3, "搜索\tCtrl+F")
+        self.open_menu.Append(4, "批量导出...")
         self.open_menu.Enable(2, False)
+        self.open_menu.Enable(3, False)
+        self.open_menu.Enable(4, False)
         self.open_menu.Bind(wx.EVT_MENU, self.load_choose_dir, id=0)
         self.open_menu.Bind(wx.EVT_MENU, self.load_default_dir, id=1)
         self.open_menu.Bind(wx.EVT_MENU, self.reload, id=2)
+        self.open_menu.Bind(wx.EVT_MENU, self.search, id=3)
+        self.open_menu.Bind(wx.EVT_MENU, self.batch_export, id=4)
         self.menu_bar.Append(self.open_menu, "操作")
+        self.perf_menu = wx.Menu()
+        self.perf_menu.AppendCheckItem(10, "记录各阶段耗时")
+        self.perf_menu.Check(10, timer.enabled)
+        self.perf_menu.Append(11, "用 cProfile 分析下一次操作")
+        self.perf_menu.Append(12, "性能统计...")
+        self.perf_menu.Bind(wx.EVT_MENU, self.toggle_timing, id=10)
+        self.perf_menu.Bind(wx.EVT_MENU, self.profile_next_operation, id=11)
+        self.perf_menu.Bind(wx.EVT_MENU, self.show_stats, id=12)
+        self.menu_bar.Append(self.perf_menu, "性能")
         self.SetMenuBar(self.menu_bar)
 
-    def reload(self, *_) -> None:
-        if self.ts_parent_dir:
-            self.load_dir(self.ts_parent_dir)
+        last_roots = self.exam_index.get_setting("last_roots")
+        if last_roots:
+            roots = [EtsRoot(*root) for root in json.loads(last_roots) if isdir(root[1])]
+        else:
+            last_parent_dir = self.exam_index.get_setting("last_parent_dir")
+            roots = [root_of(last_parent_dir)] if last_parent_dir and isdir(last_parent_dir) else []
+        if roots:
+            self.load_roots(roots)
 
-    def ts_dir_change(self, dir_name: str):
-        dir_path = path_join(self.ts_parent_dir, dir_name)
+    def reload(self, *_) -> None:
+        if self.ts_roots:
+            # 手动刷新时检查所有作业的搜索索引
+            self.load_roots(self.ts_roots, recheck=None)
+
+    def update_watch(self):
+        # 监视各根目录的作业文件夹增删和更改时间，以及打开的作业里各条目的 content.json
+        paths = {root.path: 1 for root in self.ts_roots}
+        if self.content_json_viewer.activate_exam_dir:
+            paths[self.content_json_viewer.activate_exam_dir] = 2
+        self.watcher.watch(paths)
+
+    def on_watched_change(self, paths: set):
+        roots = [root for root in self.ts_roots if root.path in paths]
+        if roots:
+            self.ts_list.refresh_roots(roots)
+        if self.content_json_viewer.activate_exam_dir in paths:
+            self.content_json_viewer.reload_changed()
+            self.ts_list.recheck_exam(self.content_json_viewer.activate_exam_dir)
+
+    def ts_dir_change(self, dir_path: str):
         self.content_json_viewer.init_data(dir_path)
 
-    def load_default_dir(self, *_):
-        roaming_dir = expandvars(r"%APPDATA%")
-        walk_obj = walk(roaming_dir)
-        _, dir_names, _ = next(walk_obj)
-        match_pattern = re.compile(r"[0-9A-F]{20,}")
-        for dir_name in dir_names:
-            if re.match(match_pattern, dir_name):
-                self.load_dir(path_join(roaming_dir, dir_name))
+    def toggle_timing(self, event: wx.CommandEvent):
+        timer.enabled = event.IsChecked()
+
+    def profile_next_operation(self, *_):
+        timer.profile_next()
+        self.perf_menu.Check(10, True)
+        wx.MessageBox("下一次加载文件夹、切换作业、翻页或导出时会用 cProfile 分析，结果在“性能统计”里查看。", "提示", wx.OK | wx.ICON_INFORMATION, parent=self)
+
+    def performance_snapshot(self) -> dict:
+        return {
+            "json_decoder": json_decoder_name(),
+            "caches": cache_stats(),
+            "prefetcher": self.content_json_viewer.prefetcher.stats(),
+        }
+
+    def show_stats(self, *_):
+        with StatsDialog(self, self.performance_snapshot) as stats_dlg:
+            stats_dlg.ShowModal()
+
+    def search(self, *_):
+        with wx.TextEntryDialog(self, "输入要查找的对话、关键词或答案：", "搜索") as query_dlg:
+            if query_dlg.ShowModal() != wx.ID_OK:
+                return
+            query = query_dlg.GetValue().strip()
+        hits = self.search_index.search(query)
+        if not hits:
+            wx.MessageBox(f"没有找到：{query}", "搜索", wx.OK | wx.ICON_INFORMATION, parent=self)
+            return
+        labels = {root.path: f"[{root.label}] " for root in self.ts_roots} if len(self.ts_roots) > 1 else {}
+        choices = [
+            f"{labels.get(dirname(hit.exam_dir), '')}{hit.exam_name} / {hit.content_name}：{self.search_index.snippet(hit, query)}"
+            for hit in hits
+        ]
+        with wx.SingleChoiceDialog(self, f"共 {len(hits)} 条结果", "搜索结果", choices) as result_dlg:
+            if result_dlg.ShowModal() != wx.ID_OK:
+                return
+            hit = hits[result_dlg.GetSelection()]
+        self.jump_to(hit.exam_dir, hit.content_name)
+
+    def jump_to(self, dir_path: str, content_name: str):
+        self.ts_list.select_path(dir_path)
+        self.content_json_viewer.init_data(dir_path, content_name)
+
+    def batch_export(self, *_):
+        with wx.DirDialog(self, "选择导出目录") as dir_dlg:
+            if dir_dlg.ShowModal() != wx.ID_OK:
                 return
-        if isdir(path_join(roaming_dir, "ETS")):
-            self.load_dir(path_join(roaming_dir, "ETS"))
+            output_dir = dir_dlg.GetPath()
+        archive = wx.MessageBox("是否另外把导出文件打包成 zip 文件？", "批量导出", wx.YES_NO | wx.ICON_QUESTION, parent=self) == wx.YES
+        self.open_menu.Enable(4, False)
+        self.batch_cancel = Event()
+        self.batch_progress = wx.ProgressDialog(
+            "批量导出", "正在检查有变化的作业...", maximum=BATCH_PROGRESS_RANGE, parent=self,
+            style=wx.PD_APP_MODAL | wx.PD_CAN_ABORT | wx.PD_ELAPSED_TIME
+        )
+        Thread(
+            target=self.batch_worker,
+            args=(list(self.ts_roots), output_dir, archive, self.content_json_viewer.pretty_print_enabled, self.content_json_viewer.show_full_answers),
+            daemon=True
+        ).start()
+
+    def batch_worker(self, roots: list, output_dir: str, archive: bool, pretty_print_enabled: bool, show_full_answers: bool):
+        results = []
+        error = ""
+        try:
+            with timer.operation("batch_export"):
+                for root in roots:
+                    # 多个账号时各自导出到以账号命名的子目录
+                    result = batch_export(
+                        root.path, output_dir if len(roots) == 1 else path_join(output_dir, root.label), pretty_print_enabled, show_full_answers,
+                        progress=lambda done, total, exam_name, label=root.label: wx.CallAfter(self.on_batch_progress, label, done, total),
+                        cancel_event=self.batch_cancel,
+                        archive_path=path_join(output_dir, f"export_{root.label}.zip") if archive else None
+                    )
+                    results.append(result)
+                    if result.cancelled:
+                        break
+        except Exception as e:
+            print_exc()
+            error = str(e)
+        finally:
+            # 无论成功与否都要关闭进度对话框
+            wx.CallAfter(self.on_batch_done, output_dir, results, error)
+
+    def on_batch_progress(self, label: str, done: int, total: int):
+        if self.batch_progress is None:
+            return
+        keep_going, _ = self.batch_progress.Update(done * (BATCH_PROGRESS_RANGE - 1) // total if total else 0, f"{label}：{done}/{total}")
+        if not keep_going:
+            self.batch_cancel.set()
+
+    def on_batch_done(self, output_dir: str, results: list, error: str):
+        self.batch_progress.Destroy()
+        self.batch_progress = None
+        self.open_menu.Enable(4, True)
+        if error:
+            wx.MessageBox(f"批量导出失败：{error}", "错误", wx.OK | wx.ICON_ERROR, parent=self)
+            return
+        failed = [failure for result in results for failure in result.failed]
+        message = (
+            f"导出 {sum(result.exported for result in results)} 个作业，"
+            f"未变化跳过 {sum(result.skipped for result in results)} 个，失败 {len(failed)} 个。\n文件保存至：\n{output_dir}"
+        )
+        if failed:
+            message += "\n\n" + "\n".join(f"{exam_name}: {error}" for exam_name, error in failed[:10])
+        if any(result.cancelled for result in results):
+            message = "导出已取消，下次会从未完成的作业继续。\n" + message
+        wx.MessageBox(message, "批量导出", wx.OK | wx.ICON_INFORMATION, parent=self)
+
+    def load_default_dir(self, *_):
+        # 同一台电脑上可能登录过多个账号，所有账号的文件夹合并显示
+        roots = find_ets_roots(expandvars(r"%APPDATA%"))
+        if roots:
+            self.load_roots(roots)
         else:
             wx.MessageBox("未找到ETS文件夹", "错误", wx.OK | wx.ICON_ERROR, parent=self)
 
     def load_choose_dir(self, *_):
         with wx.DirDialog(self, "选择文件夹") as dir_dlg:
             if dir_dlg.ShowModal() == wx.ID_OK:
-                self.load_dir(dir_dlg.GetPath())
+                self.load_roots([root_of(dir_dlg.GetPath())])
 
-    def load_dir(self, dir_path: str):
+    def load_roots(self, roots: list, recheck=()):
         self.open_menu.Enable(2, True)
-        self.ts_parent_dir = dir_path
-        self.ts_list.load_dir(dir_path)
+        self.open_menu.Enable(3, True)
+        self.open_menu.Enable(4, self.batch_progress is None)
+        self.ts_roots = roots
+        self.exam_index.set_setting("last_roots", json.dumps([list(root) for root in roots], ensure_ascii=False))
+        self.ts_list.load_roots(roots, recheck)
+        self.update_watch()
 
 if __name__ == "__main__":
+    # 批量导出用到多进程，打包成 exe 后子进程需要它
+    freeze_support()
     app = wx.App()
     viewer = Viewer(None)
     viewer.Show()
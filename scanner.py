@@ -0,0 +1,64 @@
+import re
+from os import scandir
+from os.path import basename, normpath
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from loader import EXAM_DIR_PATTERN
+from timing import timer
+
+ACCOUNT_DIR_PATTERN = re.compile(r"[0-9A-F]{20,}")
+MAX_SCAN_WORKERS = 4
+
+# label 是显示在列表里的账号名或根目录名
+EtsRoot = namedtuple("EtsRoot", ["label", "path"])
+ScanEntry = namedtuple("ScanEntry", ["name", "mtime_ns"])
+RootEntry = namedtuple("RootEntry", ["label", "root", "name", "mtime_ns"])
+
+def root_of(path: str) -> EtsRoot:
+    return EtsRoot(basename(normpath(path)), path)
+
+def find_ets_roots(roaming_dir: str) -> list:
+    # %APPDATA% 下每个账号一个 [0-9A-F]{20,} 文件夹，另外旧版本直接使用 ETS 文件夹
+    roots = []
+    try:
+        with scandir(roaming_dir) as entries:
+            for entry in entries:
+                if (ACCOUNT_DIR_PATTERN.match(entry.name) or entry.name == "ETS") and entry.is_dir():
+                    roots.append(EtsRoot(entry.name, entry.path))
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    roots.sort(key=lambda root: (root.label == "ETS", root.label))
+    return roots
+
+def scan_exam_dirs(parent: str) -> list:
+    # DirEntry 自带类型信息，Windows 上还自带 stat 结果，不需要再对每个文件夹单独 stat
+    result = []
+    with timer.stage("scan"), scandir(parent) as entries:
+        for entry in entries:
+            if not EXAM_DIR_PATTERN.match(entry.name):
+                continue
+            try:
+                if entry.is_dir():
+                    result.append(ScanEntry(entry.name, entry.stat().st_mtime_ns))
+            except FileNotFoundError:
+                continue
+    return result
+
+def scan_roots(roots: list, max_workers: int = MAX_SCAN_WORKERS) -> list:
+    # 并行扫描多个根目录，合并成一个带账号标记的列表；不存在的根目录当作空目录
+    def scan(root: EtsRoot) -> list:
+        try:
+            return scan_exam_dirs(root.path)
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+
+    if max_workers <= 1 or len(roots) <= 1:
+        results = [scan(root) for root in roots]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(roots))) as pool:
+            results = list(pool.map(scan, roots))
+    return [
+        RootEntry(root.label, root.path, entry.name, entry.mtime_ns)
+        for root, entries in zip(roots, results)
+        for entry in entries
+    ]
@@ -0,0 +1,257 @@
+import re
+import json
+from math import log
+from threading import Lock
+from os import stat
+from collections import Counter, namedtuple
+from os.path import join as path_join
+from loader import content_json_path, read_json_file, document_cache, file_signature
+from core import clean_html_tags
+
+CJK_CHARS = r"\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+TOKEN_PATTERN = re.compile(rf"[{CJK_CHARS}]+|[^\W{CJK_CHARS}]+")
+CJK_PATTERN = re.compile(rf"[{CJK_CHARS}]")
+ETS_TH_PATTERN = re.compile(r"ets_th\d+\s*")
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SearchHit = namedtuple("SearchHit", ["exam_dir", "exam_name", "content_index", "content_name", "score"])
+
+def tokenize(text: str) -> list:
+    # 英文按单词切分；中文连续片段同时索引单字和相邻二字，查询时用二字组合匹配
+    tokens = []
+    for run in TOKEN_PATTERN.findall(text.lower()):
+        if CJK_PATTERN.match(run):
+            tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+def query_tokens(query: str) -> list:
+    tokens = []
+    for run in TOKEN_PATTERN.findall(query.lower()):
+        if CJK_PATTERN.match(run) and len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return list(dict.fromkeys(tokens))
+
+def _dict(value) -> dict:
+    return value if isinstance(value, dict) else {}
+
+def _dicts(value) -> list:
+    return [item for item in value if isinstance(item, dict)] if isinstance(value, list) else []
+
+def _values(items, key: str) -> list:
+    return [item.get(key, "") for item in _dicts(items)]
+
+def iter_search_fields(document) -> list:
+    # 字段类型不对 (比如 "info": null) 时跳过该字段，不让一个条目影响整个父目录的索引
+    if not isinstance(document, dict):
+        return []
+    info = _dict(document.get("info"))
+    structure_type = document.get("structure_type")
+    fields = []
+    if structure_type == "collector.role":
+        fields.append(info.get("value", ""))
+        for question in _dicts(info.get("question")):
+            ask = question.get("ask", "")
+            if isinstance(ask, str):
+                fields.append(ETS_TH_PATTERN.sub("", clean_html_tags(ask)))
+            fields.append(question.get("keywords", ""))
+            fields.extend(_values(question.get("std"), "value"))
+    elif structure_type == "collector.picture":
+        fields.extend([info.get("topic", ""), info.get("value", ""), info.get("keypoint", "")])
+        fields.extend(_values(info.get("std"), "value"))
+    elif structure_type == "collector.choose":
+        fields.append(info.get("st_nr", ""))
+        for xt_item in _dicts(info.get("xtlist")):
+            fields.append(xt_item.get("xt_nr", ""))
+            fields.extend(_values(xt_item.get("xxlist"), "xx_nr"))
+    elif structure_type in ("collector.read", "collector.repeat_essay", "collector.repeat_dialogue"):
+        fields.append(info.get("value", ""))
+        sublist = info.get("sublist")
+        fields.extend(_values(sublist, "text"))
+        fields.extend(_values(sublist, "translate"))
+    elif structure_type == "collector.word":
+        fields.extend([info.get("value", ""), info.get("translate", "")])
+    return [clean_html_tags(field) for field in fields if isinstance(field, str) and field]
+
+def exam_documents(exam_dir: str, content_dirs: list) -> list:
+    documents = []
+    for content_index, content_dir in enumerate(content_dirs):
+        try:
+            document = read_json_file(content_json_path(exam_dir, content_dir))
+        except (ValueError, FileNotFoundError):
+            continue
+        term_counts = Counter()
+        for field in iter_search_fields(document):
+            term_counts.update(tokenize(field))
+        documents.append((content_index, content_dir, term_counts))
+    return documents
+
+def exam_signature(exam_dir: str, content_dirs: list) -> str:
+    # 各条目 content.json 的 (mtime, 大小)，文件被原地改写时作业文件夹的 mtime 不变，但签名会变
+    signature = []
+    for content_dir in content_dirs:
+        try:
+            signature.append([content_dir, *file_signature(stat(content_json_path(exam_dir, content_dir)))])
+        except OSError:
+            signature.append([content_dir, None, None])
+    return json.dumps(signature, ensure_ascii=False)
+
+class SearchIndex:
+    # 内存倒排索引：词 -> {文档号: 词频}，文档是某个作业文件夹下的一个 content 条目。
+    # 可以同时索引多个父目录 (多个账号)，作业以完整路径区分。给出 store (ExamIndex) 时
+    # 各作业的词频保存在索引数据库里，签名没变的作业下次启动时直接读出，不用重新读取和分词
+    def __init__(self, store=None):
+        self.store = store
+        self.parents = set()
+        self.postings = {}
+        self.docs = {}
+        self.exam_docs = {}
+        self.total_length = 0
+        self.next_doc_id = 0
+        self.lock = Lock()
+        self.update_locks = {}
+
+    def set_parents(self, parents: list):
+        # 换了父目录时丢掉不再需要的作业，还在的父目录的索引保留
+        with self.lock:
+            self.parents = set(parents)
+            stale = [exam_dir for exam_dir, (parent, _, _) in self.exam_docs.items() if parent not in self.parents]
+        for exam_dir in stale:
+            self.remove_exam(exam_dir)
+
+    def update_lock(self, parent: str) -> Lock:
+        with self.lock:
+            return self.update_locks.setdefault(parent, Lock())
+
+    def update(self, parent: str, records: list, changed: list, removed: list, recheck=None):
+        # records/changed/removed 与 ExamIndex.refresh 的返回值一致；parent 必须已经通过 set_parents 加入。
+        # 同一个父目录的更新 (启动时的刷新、监视到变化后的刷新、手动刷新) 依次执行，不会重复索引同一个作业。
+        # content.json 被原地改写时作业文件夹的 mtime 不变，要靠 exam_signature 发现，但它要 stat 每个条目：
+        # recheck 为 None 时检查全部作业，否则只检查 changed 和 recheck 里的作业，其余沿用已有的索引
+        with self.update_lock(parent):
+            for name in set(changed) | set(removed):
+                self.remove_exam(path_join(parent, name))
+            stored = self.store.load_search_docs(parent) if self.store is not None else {}
+            stale = None if recheck is None else set(changed) | set(recheck)
+            saved = []
+            for record in records:
+                if parent not in self.parents:
+                    break
+                entry = self.index_record(parent, record, stored, stale is None or record.name in stale)
+                if entry is not None:
+                    saved.append(entry)
+            if self.store is not None:
+                names = {record.name for record in records}
+                self.store.save_search_docs(parent, saved, [name for name in stored if name not in names])
+
+    def update_exam(self, parent: str, record):
+        # 只重新检查一个作业，比如打开的作业里有 content.json 被改写
+        with self.update_lock(parent):
+            stored = self.store.load_search_docs(parent) if self.store is not None else {}
+            entry = self.index_record(parent, record, stored, True)
+            if entry is not None and self.store is not None:
+                self.store.save_search_docs(parent, [entry], [])
+
+    def index_record(self, parent: str, record, stored: dict, check: bool):
+        # 需要时索引一个作业；新读取了文件时返回要保存的 (作业文件夹名, 签名, 文档列表)。调用时需持有 update_lock(parent)
+        exam_dir = path_join(parent, record.name)
+        indexed = self.exam_docs.get(exam_dir)
+        if indexed is not None and not check:
+            return None
+        if not check and record.name in stored:
+            signature = stored[record.name][0]
+        else:
+            signature = exam_signature(exam_dir, record.content_dirs)
+        if indexed is not None and indexed[1] == signature:
+            return None
+        if record.name in stored and stored[record.name][0] == signature:
+            documents = [(content_index, content_dir, Counter(term_counts)) for content_index, content_dir, term_counts in stored[record.name][1]]
+            self.add_exam(parent, record.name, documents, signature)
+            return None
+        documents = exam_documents(exam_dir, record.content_dirs)
+        self.add_exam(parent, record.name, documents, signature)
+        return record.name, signature, documents
+
+    def add_exam(self, parent: str, exam_name: str, documents: list, signature: str = None):
+        exam_dir = path_join(parent, exam_name)
+        with self.lock:
+            if parent not in self.parents:
+                return
+            indexed = self.exam_docs.get(exam_dir)
+            if indexed is not None:
+                if indexed[1] == signature:
+                    return
+                self.drop_exam(exam_dir)
+            doc_ids = []
+            for content_index, content_name, term_counts in documents:
+                doc_id = self.next_doc_id
+                self.next_doc_id += 1
+                length = sum(term_counts.values())
+                self.docs[doc_id] = (exam_dir, exam_name, content_index, content_name, length, term_counts)
+                self.total_length += length
+                for token, count in term_counts.items():
+                    self.postings.setdefault(token, {})[doc_id] = count
+                doc_ids.append(doc_id)
+            self.exam_docs[exam_dir] = (parent, signature, doc_ids)
+
+    def remove_exam(self, exam_dir: str):
+        with self.lock:
+            self.drop_exam(exam_dir)
+
+    def drop_exam(self, exam_dir: str):
+        # 调用时需持有 self.lock
+        _, _, doc_ids = self.exam_docs.pop(exam_dir, (None, None, []))
+        for doc_id in doc_ids:
+            _, _, _, _, length, term_counts = self.docs.pop(doc_id)
+            self.total_length -= length
+            for token in term_counts:
+                posting = self.postings[token]
+                del posting[doc_id]
+                if not posting:
+                    del self.postings[token]
+
+    def search(self, query: str, limit: int = 50) -> list:
+        tokens = query_tokens(query)
+        if not tokens:
+            return []
+        with self.lock:
+            postings = [self.postings.get(token) for token in tokens]
+            if not all(postings):
+                return []
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates.intersection_update(posting)
+            doc_count = len(self.docs)
+            average_length = self.total_length / doc_count if doc_count else 0
+            scores = {}
+            for posting in postings:
+                idf = log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id in candidates:
+                    frequency = posting[doc_id]
+                    length = self.docs[doc_id][4]
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length) if average_length else BM25_K1
+                    scores[doc_id] = scores.get(doc_id, 0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            return [SearchHit(*self.docs[doc_id][:4], score) for doc_id, score in ranked]
+
+    def snippet(self, hit: SearchHit, query: str, width: int = 30) -> str:
+        try:
+            document = document_cache.get(content_json_path(hit.exam_dir, hit.content_name))
+        except (ValueError, FileNotFoundError):
+            return ""
+        text = " ".join(" ".join(field.split()) for field in iter_search_fields(document))
+        lowered = text.lower()
+        position = -1
+        for run in TOKEN_PATTERN.findall(query.lower()):
+            position = lowered.find(run)
+            if position != -1:
+                break
+        start = max(position - width, 0)
+        end = start + 2 * width + len(query)
+        return ("..." if start else "") + text[start:end] + ("..." if end < len(text) else "")
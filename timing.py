@@ -0,0 +1,148 @@
+import io
+import json
+import time
+import pstats
+import cProfile
+import platform
+from os import environ
+from math import ceil
+from datetime import datetime
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from threading import Lock
+
+WINDOW_SIZE = 512
+PERCENTILES = (50, 90, 99)
+PROFILE_LINES = 40
+NULL_CONTEXT = nullcontext()
+
+def percentile(sorted_samples: list, p: int) -> float:
+    # 最近秩法，样本已排序
+    if not sorted_samples:
+        return 0.0
+    rank = max(ceil(p / 100 * len(sorted_samples)) - 1, 0)
+    return sorted_samples[rank]
+
+class StageTimer:
+    # 记录各阶段最近 WINDOW_SIZE 次的耗时。关闭时 stage() 直接返回空的上下文管理器，几乎没有开销。
+    # 阶段 (scan、read、json.loads、format、SetValue) 和操作 (load_dir、init_data、content_change、export)
+    # 都按名称记录；操作还可以用 profile_next() 让下一次执行时用 cProfile 分析
+    def __init__(self, enabled: bool = False, window_size: int = WINDOW_SIZE):
+        self.enabled = enabled
+        self.window_size = window_size
+        self.samples = {}
+        self.counts = {}
+        self.totals = {}
+        self.profile_target = None
+        self.profile_result = None
+        self.lock = Lock()
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return NULL_CONTEXT
+        return self.timed(name)
+
+    def operation(self, name: str):
+        if self.profile_target is not None and self.profile_target in ("*", name):
+            return self.profiled(name)
+        return self.stage(name)
+
+    @contextmanager
+    def timed(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    @contextmanager
+    def profiled(self, name: str):
+        with self.lock:
+            if self.profile_target is None:
+                profile = None
+            else:
+                self.profile_target = None
+                profile = cProfile.Profile()
+        start = time.perf_counter()
+        if profile is not None:
+            try:
+                profile.enable()
+            except ValueError:
+                # 其他线程已经在分析，这次只计时
+                profile = None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            self.record(name, time.perf_counter() - start)
+            if profile is not None:
+                output = io.StringIO()
+                pstats.Stats(profile, stream=output).sort_stats("cumulative").print_stats(PROFILE_LINES)
+                self.profile_result = {"operation": name, "time": datetime.now().isoformat(timespec="seconds"), "text": output.getvalue()}
+
+    def record(self, name: str, seconds: float):
+        with self.lock:
+            window = self.samples.get(name)
+            if window is None:
+                window = self.samples[name] = deque(maxlen=self.window_size)
+            window.append(seconds)
+            self.counts[name] = self.counts.get(name, 0) + 1
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+
+    def profile_next(self, operation: str = "*"):
+        # 打开计时，并在下一次执行 operation ("*" 表示任意操作) 时抓取 cProfile 结果
+        self.enabled = True
+        self.profile_target = operation
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+            self.counts.clear()
+            self.totals.clear()
+            self.profile_result = None
+
+    def stats(self) -> dict:
+        # 时间单位为毫秒；百分位只统计滚动窗口内的样本，count 和 total 是累计值
+        with self.lock:
+            windows = {name: sorted(window) for name, window in self.samples.items()}
+            counts = dict(self.counts)
+            totals = dict(self.totals)
+        result = {}
+        for name, samples in windows.items():
+            stage = {"count": counts[name], "total_ms": totals[name] * 1000, "mean_ms": sum(samples) / len(samples) * 1000}
+            for p in PERCENTILES:
+                stage[f"p{p}_ms"] = percentile(samples, p) * 1000
+            stage["max_ms"] = samples[-1] * 1000
+            result[name] = stage
+        return result
+
+    def report(self) -> str:
+        stats = self.stats()
+        if not stats:
+            return "还没有记录。请先在“性能”菜单里打开“记录各阶段耗时”，或设置环境变量 ETSVIEWER_TIMING=1。"
+        header = f"{'阶段':<16}{'次数':>8}{'平均':>10}" + "".join(f"{f'p{p}':>10}" for p in PERCENTILES) + f"{'最大':>10}"
+        lines = [header]
+        for name, stage in sorted(stats.items()):
+            lines.append(
+                f"{name:<16}{stage['count']:>8}{stage['mean_ms']:>8.1f}ms"
+                + "".join(f"{stage[f'p{p}_ms']:>8.1f}ms" for p in PERCENTILES)
+                + f"{stage['max_ms']:>8.1f}ms"
+            )
+        return "\n".join(lines)
+
+    def dump(self, path: str, extra: dict = None):
+        # 保存成 JSON，方便附在问题反馈里
+        result = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "stages": self.stats(),
+            "profile": self.profile_result,
+        }
+        if extra:
+            result.update(extra)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=4)
+
+timer = StageTimer(environ.get("ETSVIEWER_TIMING", "") not in ("", "0"))
@@ -0,0 +1,341 @@
+import os
+import sys
+import time
+import ctypes
+import struct
+from os import scandir
+from select import select
+from threading import Lock, Event, Thread
+
+DEBOUNCE_SECONDS = 0.5
+MAX_DEBOUNCE_ROUNDS = 10
+POLL_INTERVAL = 2.0
+
+# 被监视的目录用 路径 -> 深度 表示：深度为 1 时关注目录下各条目的增删和 (mtime, 大小)，
+# 深度为 2 时再加上子目录里各条目的。作业文件夹新增条目会改变文件夹自己的 mtime，
+# 所以父目录只需要深度 1，打开的作业需要深度 2 才能看到 content.json 被改写
+
+def tree_signature(path: str, depth: int) -> dict:
+    # 路径 -> (mtime, 大小)，轮询时比较前后两次的结果
+    signature = {}
+
+    def walk(dir_path: str, level: int):
+        try:
+            with scandir(dir_path) as entries:
+                for entry in entries:
+                    try:
+                        stat_result = entry.stat(follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+                    signature[entry.path] = (stat_result.st_mtime_ns, stat_result.st_size)
+                    if level < depth and entry.is_dir(follow_symlinks=False):
+                        walk(entry.path, level + 1)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            signature[dir_path] = None
+
+    walk(path, 1)
+    return signature
+
+class PollingBackend:
+    # 没有系统通知时的后备方案，每 poll_interval 秒对被监视的目录做一次 scandir
+    def __init__(self, poll_interval: float = POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self.paths = {}
+        self.signatures = {}
+        self.woken = Event()
+
+    def set_paths(self, paths: dict):
+        # 没有变化的被监视目录沿用上次的结果，不重新扫描
+        previous, self.paths = self.paths, paths
+        self.signatures = {
+            path: self.signatures[path] if previous.get(path) == depth else tree_signature(path, depth)
+            for path, depth in paths.items()
+        }
+
+    def poll(self) -> set:
+        changed = set()
+        for path, depth in self.paths.items():
+            signature = tree_signature(path, depth)
+            if signature != self.signatures[path]:
+                self.signatures[path] = signature
+                changed.add(path)
+        return changed
+
+    def wait(self, timeout: float = None) -> set:
+        # timeout 为 None 时一直等到有变化或被 wake() 唤醒
+        while True:
+            if self.woken.wait(self.poll_interval if timeout is None else timeout):
+                self.woken.clear()
+                return set()
+            changed = self.poll()
+            if changed or timeout is not None:
+                return changed
+
+    def wake(self):
+        self.woken.set()
+
+    def close(self):
+        pass
+
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ONLYDIR = 0x1000000
+IN_MASK_ADD = 0x20000000
+IN_ISDIR = 0x40000000
+# 最深一层的目录只关心自己的 mtime，也就是其中条目的增删；上面几层还关心条目的内容和属性
+NAME_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+ENTRY_MASK = NAME_MASK | IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE
+EVENT_HEADER = struct.Struct("iIII")
+
+class InotifyBackend:
+    # Linux 上用 inotify，没有事件时线程阻塞在 select 上，不占 CPU。inotify 不递归，按深度给每层子目录单独加监视。
+    # 同一个目录可能同时属于几个被监视的目录 (打开的作业也是父目录的子目录)，共用一个 wd
+    def __init__(self):
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.wake_read, self.wake_write = os.pipe()
+        self.paths = {}
+        # wd -> {被监视的目录: 该目录在其中的层级}，wd -> 实际目录
+        self.watches = {}
+        self.watch_dirs = {}
+
+    def watch_mask(self, owners: dict) -> int:
+        mask = 0
+        for path, level in owners.items():
+            if path in self.paths:
+                mask |= ENTRY_MASK if level < self.paths[path] else NAME_MASK
+        return mask
+
+    def add_watches(self, path: str, dir_path: str = None, level: int = 0):
+        # 从 dir_path (默认为 path 本身) 开始，给 path 深度以内的各层目录加监视
+        depth = self.paths[path]
+
+        def add(dir_path: str, level: int):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dir_path), (ENTRY_MASK if level < depth else NAME_MASK) | IN_ONLYDIR | IN_MASK_ADD)
+            if wd < 0:
+                return
+            self.watches.setdefault(wd, {})[path] = level
+            self.watch_dirs[wd] = dir_path
+            if level < depth:
+                try:
+                    with scandir(dir_path) as entries:
+                        subdirs = [entry.path for entry in entries if entry.is_dir(follow_symlinks=False)]
+                except OSError:
+                    return
+                for subdir in subdirs:
+                    add(subdir, level + 1)
+
+        add(dir_path or path, level)
+
+    def remove_watches(self, path: str):
+        # 只属于 path 的 wd 直接移除，和其他被监视目录共用的 wd 改成其余目录需要的掩码
+        for wd, owners in list(self.watches.items()):
+            if owners.pop(path, None) is None:
+                continue
+            if not owners:
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.watches[wd]
+                del self.watch_dirs[wd]
+            elif self.watch_mask(owners):
+                self.libc.inotify_add_watch(self.fd, os.fsencode(self.watch_dirs[wd]), self.watch_mask(owners) | IN_ONLYDIR)
+
+    def set_paths(self, paths: dict):
+        # 只增删有变化的被监视目录，切换打开的作业时父目录下的监视保持不动
+        previous, self.paths = self.paths, dict(paths)
+        for path, depth in previous.items():
+            if paths.get(path) != depth:
+                self.remove_watches(path)
+        for path, depth in paths.items():
+            if previous.get(path) != depth:
+                self.add_watches(path)
+
+    def wait(self, timeout: float = None) -> set:
+        readable, _, _ = select([self.fd, self.wake_read], [], [], timeout)
+        if self.wake_read in readable:
+            os.read(self.wake_read, 4096)
+            return set()
+        if not readable:
+            return set()
+        changed = set()
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        new_dirs = []
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].split(b"\0", 1)[0]
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                # 事件队列溢出，可能漏掉了新建的子目录，全部重新加一遍
+                changed.update(self.paths)
+                for path in self.paths:
+                    self.add_watches(path)
+            elif mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                self.watch_dirs.pop(wd, None)
+            elif wd in self.watches:
+                changed.update(self.watches[wd])
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    new_dirs.append((wd, os.fsdecode(name)))
+        # 新建的子目录也要加上监视，已有的目录不用重新扫描
+        for wd, name in new_dirs:
+            for path, level in list(self.watches.get(wd, {}).items()):
+                if path in self.paths and level < self.paths[path]:
+                    self.add_watches(path, os.path.join(self.watch_dirs[wd], name), level + 1)
+        return changed
+
+    def wake(self):
+        os.write(self.wake_write, b"x")
+
+    def close(self):
+        os.close(self.fd)
+        os.close(self.wake_read)
+        os.close(self.wake_write)
+
+FILE_NOTIFY_CHANGE_FILE_NAME = 0x1
+FILE_NOTIFY_CHANGE_DIR_NAME = 0x2
+FILE_NOTIFY_CHANGE_SIZE = 0x8
+FILE_NOTIFY_CHANGE_LAST_WRITE = 0x10
+NOTIFY_FILTER = FILE_NOTIFY_CHANGE_FILE_NAME | FILE_NOTIFY_CHANGE_DIR_NAME | FILE_NOTIFY_CHANGE_SIZE | FILE_NOTIFY_CHANGE_LAST_WRITE
+INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+WAIT_OBJECT_0 = 0
+WAIT_TIMEOUT = 0x102
+INFINITE = 0xFFFFFFFF
+MAXIMUM_WAIT_OBJECTS = 64
+
+class WindowsBackend:
+    # Windows 上用 FindFirstChangeNotification，每个被监视的目录一个句柄 (包含子目录)，
+    # 线程阻塞在 WaitForMultipleObjects 上，不占 CPU。只知道哪个目录有变化，具体变化由调用方重新扫描
+    def __init__(self):
+        self.kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        self.kernel32.FindFirstChangeNotificationW.restype = ctypes.c_void_p
+        self.kernel32.FindFirstChangeNotificationW.argtypes = (ctypes.c_wchar_p, ctypes.c_int, ctypes.c_uint32)
+        self.kernel32.FindNextChangeNotification.argtypes = (ctypes.c_void_p,)
+        self.kernel32.FindCloseChangeNotification.argtypes = (ctypes.c_void_p,)
+        self.kernel32.CreateEventW.restype = ctypes.c_void_p
+        self.kernel32.SetEvent.argtypes = (ctypes.c_void_p,)
+        self.kernel32.CloseHandle.argtypes = (ctypes.c_void_p,)
+        self.kernel32.WaitForMultipleObjects.argtypes = (ctypes.c_uint32, ctypes.POINTER(ctypes.c_void_p), ctypes.c_int, ctypes.c_uint32)
+        self.kernel32.WaitForMultipleObjects.restype = ctypes.c_uint32
+        self.wake_event = self.kernel32.CreateEventW(None, False, False, None)
+        self.paths = {}
+        self.handles = []
+
+    def set_paths(self, paths: dict):
+        # 保留仍然被监视的目录的句柄，只关闭和新建有变化的
+        self.paths = paths
+        handles = []
+        for handle, path in self.handles:
+            if path in paths:
+                handles.append((handle, path))
+            else:
+                self.kernel32.FindCloseChangeNotification(handle)
+        watched = {path for _, path in handles}
+        for path in paths:
+            if path in watched or len(handles) >= MAXIMUM_WAIT_OBJECTS - 1:
+                continue
+            handle = self.kernel32.FindFirstChangeNotificationW(path, True, NOTIFY_FILTER)
+            if handle is not None and handle != INVALID_HANDLE_VALUE:
+                handles.append((handle, path))
+        self.handles = handles
+
+    def wait(self, timeout: float = None) -> set:
+        objects = (ctypes.c_void_p * (len(self.handles) + 1))(self.wake_event, *(handle for handle, _ in self.handles))
+        changed = set()
+        milliseconds = INFINITE if timeout is None else int(timeout * 1000)
+        while True:
+            result = self.kernel32.WaitForMultipleObjects(len(objects), objects, False, milliseconds)
+            index = result - WAIT_OBJECT_0
+            if not 0 <= index < len(objects):
+                return changed
+            if index == 0:
+                return set()
+            handle, path = self.handles[index - 1]
+            self.kernel32.FindNextChangeNotification(handle)
+            changed.add(path)
+            # 同时有信号的其他句柄也一并取走
+            milliseconds = 0
+
+    def wake(self):
+        self.kernel32.SetEvent(self.wake_event)
+
+    def close_handles(self):
+        for handle, _ in self.handles:
+            self.kernel32.FindCloseChangeNotification(handle)
+        self.handles = []
+
+    def close(self):
+        self.close_handles()
+        self.kernel32.CloseHandle(self.wake_event)
+
+def default_backend(poll_interval: float = POLL_INTERVAL):
+    # 环境变量 ETSVIEWER_WATCH=poll 强制使用轮询，比如监视网络磁盘时系统通知可能不可靠
+    if os.environ.get("ETSVIEWER_WATCH") != "poll":
+        try:
+            if sys.platform == "win32":
+                return WindowsBackend()
+            if sys.platform.startswith("linux"):
+                return InotifyBackend()
+        except (OSError, AttributeError):
+            pass
+    return PollingBackend(poll_interval)
+
+class DirectoryWatcher:
+    # 后台线程等待被监视目录的变化。连续的一批事件在安静 debounce 秒后合并成一次 callback(有变化的被监视目录集合)，
+    # 事件一直不停时最多等 MAX_DEBOUNCE_ROUNDS 轮。callback 在监视线程里调用
+    def __init__(self, callback, debounce: float = DEBOUNCE_SECONDS, backend=None):
+        self.callback = callback
+        self.debounce = debounce
+        self.backend = backend or default_backend()
+        self.lock = Lock()
+        self.pending = None
+        self.stopped = False
+        self.thread = Thread(target=self.run, name="dir-watcher", daemon=True)
+        self.thread.start()
+
+    def watch(self, paths: dict):
+        with self.lock:
+            self.pending = dict(paths)
+        self.backend.wake()
+
+    def stop(self):
+        with self.lock:
+            self.stopped = True
+        self.backend.wake()
+
+    def run(self):
+        paths = {}
+        while True:
+            with self.lock:
+                if self.stopped:
+                    self.backend.close()
+                    return
+                if self.pending is not None:
+                    paths, self.pending = self.pending, None
+                    self.backend.set_paths(paths)
+            changed = self.backend.wait()
+            if not changed:
+                continue
+            deadline = time.monotonic() + self.debounce * MAX_DEBOUNCE_ROUNDS
+            while time.monotonic() < deadline:
+                more = self.backend.wait(self.debounce)
+                if not more:
+                    break
+                changed |= more
+            with self.lock:
+                changed &= set(paths if self.pending is None else self.pending)
+            if changed:
+                self.callback(changed)